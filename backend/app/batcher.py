@@ -0,0 +1,141 @@
+import asyncio
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .bidding import get_predictor
+from .config import BID_BATCH_MAX_SIZE, BID_BATCH_MAX_WAIT_US, BID_BATCHING
+
+
+# Queueing delays remembered for the latency percentiles in stats()
+DELAY_SAMPLES = 10000
+
+
+def score_requests(rows):
+    """(ctr, cvr) arrays for a list of feature tuples, in one vectorized call."""
+
+    predictor = get_predictor()
+    X = np.array(rows, dtype=np.float64)
+
+    if predictor.scorer is not None:
+        return predictor.scorer.score_batch(X)
+    return predictor.predict_batch(pd.DataFrame(X, columns=predictor.feature_columns))
+
+
+class BidBatcher:
+    """
+    Coalesces concurrent bid requests into one scoring call.
+
+    Requests queue until max_size are waiting or the oldest has waited
+    max_wait_us, then the whole batch is scored at once and each caller's
+    future is resolved. Under light load a request waits at most
+    max_wait_us; under heavy load batches fill before the timer fires, so
+    throughput grows with load while the added latency stays bounded.
+    With max_wait_us=0 a batch holds the requests that arrived during
+    one pass of the event loop.
+    """
+
+    def __init__(self, max_size, max_wait_us, mode="auto"):
+        if mode not in ("auto", "always", "never"):
+            raise ValueError(f"Unknown bid batching mode: {mode}")
+
+        self.max_size = max(int(max_size), 1)
+        self.max_wait = max(max_wait_us, 0) / 1e6
+        self.mode = mode
+
+        # (features, future, enqueue time) of the batch being collected
+        self._pending = []
+        self._timer = None
+
+        self.batches = 0
+        self.items = 0
+        self.full_batches = 0
+        self.errors = 0
+        self._delays = deque(maxlen=DELAY_SAMPLES)
+
+    @property
+    def enabled(self):
+        """Whether bid requests should be scored through the batcher now."""
+
+        if self.mode == "never" or self.max_size == 1:
+            return False
+        return self.mode == "always" or get_predictor().scorer is None
+
+    async def score(self, features):
+        """(ctr, cvr) for one request's feature tuple."""
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_size:
+            self.flush()
+        elif self._timer is None:
+            if self.max_wait:
+                self._timer = loop.call_later(self.max_wait, self.flush)
+            else:
+                self._timer = loop.call_soon(self.flush)
+
+        return await future
+
+    def flush(self):
+        """Score every queued request now."""
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        start = time.perf_counter()
+        self.batches += 1
+        self.items += len(batch)
+        if len(batch) >= self.max_size:
+            self.full_batches += 1
+        self._delays.extend(start - queued for _, _, queued in batch)
+
+        try:
+            ctr, cvr = score_requests([features for features, _, _ in batch])
+        except Exception as e:
+            self.errors += 1
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future, _), c, v in zip(batch, ctr.tolist(), cvr.tolist()):
+            # The caller may have gone away (client disconnect)
+            if not future.done():
+                future.set_result((c, v))
+
+    def stats(self):
+        delays = sorted(self._delays)
+
+        def pick(q):
+            if not delays:
+                return 0.0
+            return round(delays[min(len(delays) - 1, int(q * len(delays)))] * 1e6, 1)
+
+        mean_size = self.items / self.batches if self.batches else 0.0
+        return {
+            "mode": self.mode,
+            "enabled": self.enabled,
+            "max_size": self.max_size,
+            "max_wait_us": round(self.max_wait * 1e6, 1),
+            "batches": self.batches,
+            "requests": self.items,
+            "errors": self.errors,
+            "mean_batch_size": round(mean_size, 2),
+            "mean_batch_fill": round(mean_size / self.max_size, 3),
+            "full_batches": self.full_batches,
+            "queue_delay_p50_us": pick(0.50),
+            "queue_delay_p99_us": pick(0.99),
+            "queue_delay_max_us": pick(1.0)
+        }
+
+
+bid_batcher = BidBatcher(BID_BATCH_MAX_SIZE, BID_BATCH_MAX_WAIT_US, BID_BATCHING)
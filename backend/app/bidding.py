@@ -0,0 +1,201 @@
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from rtb_engine.budget_ledger import BudgetLedger, SharedBudgetLedger
+from rtb_engine.predicator import Predictor
+from rtb_engine.strategy import BiddingStrategy
+from rtb_engine.targeting_index import DEVICE_CODES
+
+from .config import (
+    BID_MAX_PENDING,
+    BID_WIN_TIMEOUT_SECONDS,
+    BUDGET_LEDGER_PATH,
+    BUDGET_LEDGER_SLOTS,
+    PREDICTOR_REFRESH_SECONDS,
+)
+
+
+# Shared predictor for live bidding, rebuilt periodically so retrained
+# models are picked up without checking the model files on every bid
+_predictor = None
+_predictor_loaded_at = 0.0
+
+
+def get_predictor():
+    global _predictor, _predictor_loaded_at
+
+    now = time.monotonic()
+    if _predictor is None or now - _predictor_loaded_at > PREDICTOR_REFRESH_SECONDS:
+        _predictor = Predictor()
+        _predictor_loaded_at = now
+
+    return _predictor
+
+
+# Live campaign budgets, shared between processes when BUDGET_LEDGER_PATH is set
+_ledger = None
+
+
+def get_ledger():
+    global _ledger
+
+    if _ledger is None:
+        if BUDGET_LEDGER_PATH:
+            _ledger = SharedBudgetLedger(BUDGET_LEDGER_PATH, BUDGET_LEDGER_SLOTS)
+        else:
+            _ledger = BudgetLedger()
+
+    return _ledger
+
+
+def features(campaign_feature, hour, device_type, floor_price):
+    """Model feature tuple for a bid request, in Predictor.feature_columns order."""
+
+    # The clearing price is unknown before the auction; the floor stands
+    # in for the market price feature
+    return (campaign_feature, hour, device_type, floor_price, floor_price)
+
+
+class CampaignBidder:
+    """
+    Live bidding state of one campaign: its budget account, targeting
+    and the bids still waiting for a win notice. Every bid reserves its
+    price until it is won (commit) or times out (release), so concurrent
+    bids can never overspend the budget. The request path is plain
+    Python (no pandas) and scores through the native scorer, one request
+    at a time (bid) or micro-batched (bid_batched).
+    """
+
+    def __init__(self, campaign):
+        self.campaign_id = campaign.id
+        self.budget_manager = get_ledger().open(campaign.id, campaign.total_budget)
+        self.strategy = BiddingStrategy(
+            get_predictor(), self.budget_manager, campaign.conversion_weight, campaign.base_bid
+        )
+
+        # None: bid on every device
+        self.device_type = DEVICE_CODES.get(campaign.device_targeting) or None
+        self.active_hours = frozenset(campaign.active_hours) if campaign.active_hours else None
+
+        # bid id -> (bid price, expiry time), oldest first; bids without
+        # a win notice are released after BID_WIN_TIMEOUT_SECONDS or once
+        # BID_MAX_PENDING newer bids are outstanding
+        self.pending_bids = OrderedDict()
+
+        self.bids = 0
+        self.no_bids = 0
+        self.wins = 0
+        self.expired = 0
+        self.spent = 0.0
+
+    def bid(self, campaign_feature, hour, device_type, floor_price):
+        """
+        (bid_id, price) for a bid request, or (None, reason) when the
+        campaign does not bid: "targeting", "floor" or "budget".
+        """
+
+        if not self.targets(hour, device_type):
+            return self._no_bid("targeting")
+
+        ctr, cvr = get_predictor().predict(features(campaign_feature, hour, device_type, floor_price))
+        return self.place_bid(ctr, cvr, floor_price)
+
+    async def bid_batched(self, campaign_feature, hour, device_type, floor_price, batcher):
+        """bid(), scoring through a BidBatcher together with concurrent requests."""
+
+        if not self.targets(hour, device_type):
+            return self._no_bid("targeting")
+
+        ctr, cvr = await batcher.score(features(campaign_feature, hour, device_type, floor_price))
+        return self.place_bid(ctr, cvr, floor_price)
+
+    def targets(self, hour, device_type):
+        """Whether the campaign's device and hour targeting accepts the request."""
+
+        if self.device_type is not None and device_type != self.device_type:
+            return False
+        if self.active_hours is not None and hour not in self.active_hours:
+            return False
+        return True
+
+    def place_bid(self, ctr, cvr, floor_price):
+        """
+        Price a targeted request from its predicted ctr / cvr and record
+        the bid; same results as bid().
+        """
+
+        now = time.monotonic()
+        self._expire(now)
+
+        price = self.strategy.bid_for_scores(ctr, cvr)
+
+        if price < floor_price:
+            return self._no_bid("floor")
+        if not self.budget_manager.reserve(price):
+            return self._no_bid("budget")
+
+        bid_id = uuid4().hex
+        self.pending_bids[bid_id] = (price, now + BID_WIN_TIMEOUT_SECONDS)
+        if len(self.pending_bids) > BID_MAX_PENDING:
+            self._release(self.pending_bids.popitem(last=False)[1][0])
+
+        self.bids += 1
+        return bid_id, price
+
+    def _expire(self, now):
+        # Oldest first, so stop at the first bid still waiting
+        while self.pending_bids:
+            price, expires_at = next(iter(self.pending_bids.values()))
+            if expires_at > now:
+                break
+            self.pending_bids.popitem(last=False)
+            self._release(price)
+
+    def _release(self, price):
+        self.budget_manager.release(price)
+        self.expired += 1
+
+    def _no_bid(self, reason):
+        self.no_bids += 1
+        return None, reason
+
+    def win(self, bid_id, price):
+        """
+        Settle a won bid: spend the clearing price out of the bid's
+        reservation and release the rest. Raises KeyError for unknown,
+        expired or already settled bids and ValueError if the price
+        exceeds the bid.
+        """
+
+        entry = self.pending_bids.get(bid_id)
+        if entry is None:
+            raise KeyError(bid_id)
+        if price > entry[0]:
+            raise ValueError(f"Win price {price} exceeds the bid {entry[0]}")
+
+        # A concurrent notice for the same bid may have settled it
+        if self.pending_bids.pop(bid_id, None) is None:
+            raise KeyError(bid_id)
+        remaining = self.budget_manager.commit(entry[0], price)
+
+        self.wins += 1
+        self.spent += price
+        return remaining
+
+    def close(self):
+        """Forget pending bids and drop the campaign's budget account."""
+        self.pending_bids.clear()
+        self.budget_manager.ledger.close(self.campaign_id)
+
+    def stats(self):
+        return {
+            "campaign_id": self.campaign_id,
+            "bids": self.bids,
+            "no_bids": self.no_bids,
+            "wins": self.wins,
+            "expired_bids": self.expired,
+            "pending_bids": len(self.pending_bids),
+            "spent": round(self.spent, 2),
+            "budget": self.budget_manager.balance()
+        }
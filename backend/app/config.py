@@ -0,0 +1,77 @@
+import os
+
+
+# =================================================
+# SIMULATION WORKERS
+# =================================================
+
+# Processes running CPU-bound simulations (0 runs them on a thread in the
+# API process instead)
+SIMULATION_WORKERS = int(os.environ.get("BIDWISE_SIMULATION_WORKERS", os.cpu_count() or 1))
+
+# Simulations allowed to wait for a free worker before requests get 429
+SIMULATION_QUEUE_DEPTH = int(os.environ.get("BIDWISE_SIMULATION_QUEUE_DEPTH", "16"))
+
+
+# =================================================
+# SIMULATION JOBS
+# =================================================
+
+# Rows replayed between two progress updates / cancellation checks
+JOB_CHUNK_ROWS = int(os.environ.get("BIDWISE_JOB_CHUNK_ROWS", "65536"))
+
+# Finished jobs kept for polling before the oldest are dropped
+JOB_HISTORY = int(os.environ.get("BIDWISE_JOB_HISTORY", "500"))
+
+
+# =================================================
+# SIMULATION RESULT CACHE
+# =================================================
+
+# Simulation results kept in memory (least recently used are evicted)
+RESULT_CACHE_ENTRIES = int(os.environ.get("BIDWISE_RESULT_CACHE_ENTRIES", "1024"))
+
+# Optional directory mirroring cached results to disk across restarts
+RESULT_CACHE_DIR = os.environ.get("BIDWISE_RESULT_CACHE_DIR") or None
+
+# Result files kept in RESULT_CACHE_DIR before the oldest are removed
+RESULT_CACHE_DISK_ENTRIES = int(os.environ.get("BIDWISE_RESULT_CACHE_DISK_ENTRIES", "10000"))
+
+# Fused dataset insights kept in memory (keyed by dataset content and model version)
+INSIGHTS_CACHE_ENTRIES = int(os.environ.get("BIDWISE_INSIGHTS_CACHE_ENTRIES", "256"))
+
+
+# =================================================
+# LIVE BIDDING
+# =================================================
+
+# Unsettled bids remembered per campaign for win notices (oldest dropped)
+BID_MAX_PENDING = int(os.environ.get("BIDWISE_BID_MAX_PENDING", "100000"))
+
+# How often live bidding re-checks the model files for retrained models
+PREDICTOR_REFRESH_SECONDS = float(os.environ.get("BIDWISE_PREDICTOR_REFRESH_SECONDS", "5"))
+
+# When bid requests are micro-batched for scoring: "auto" only when the
+# models need sklearn (the native scorer's single-request path is faster
+# than waiting for a batch), "always" or "never"
+BID_BATCHING = os.environ.get("BIDWISE_BID_BATCHING", "auto")
+
+# Bid requests scored together in one vectorized call
+BID_BATCH_MAX_SIZE = int(os.environ.get("BIDWISE_BID_BATCH_MAX_SIZE", "64"))
+
+# Longest a bid request waits for others to fill its batch, in microseconds
+# (0 batches only the requests that arrived in the same event loop pass;
+# waits below 1 ms are rounded up to 1 ms by the event loop's poller)
+BID_BATCH_MAX_WAIT_US = float(os.environ.get("BIDWISE_BID_BATCH_MAX_WAIT_US", "500"))
+
+# Unsettled bids hold their price against the budget until a win notice
+# arrives or this many seconds pass (later notices are rejected)
+BID_WIN_TIMEOUT_SECONDS = float(os.environ.get("BIDWISE_BID_WIN_TIMEOUT_SECONDS", "60"))
+
+# File shared by every server process holding live campaign budgets, so
+# several workers can bid for one campaign without overspending; unset
+# keeps budgets in process memory
+BUDGET_LEDGER_PATH = os.environ.get("BIDWISE_BUDGET_LEDGER") or None
+
+# Campaigns the shared budget ledger file can hold
+BUDGET_LEDGER_SLOTS = int(os.environ.get("BIDWISE_BUDGET_LEDGER_SLOTS", "65536"))
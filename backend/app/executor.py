@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from rtb_engine import model_registry
+
+from .config import SIMULATION_QUEUE_DEPTH, SIMULATION_WORKERS
+
+
+class SimulationPoolSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full."""
+
+
+def _warm_worker():
+    # Load the models once per worker up front so the first simulation
+    # routed to it does not pay the unpickling cost
+    model_registry.get_models()
+
+
+class SimulationPool:
+    """
+    Bounded process pool for CPU-bound engine calls made from async routes.
+
+    At most workers + queue_depth calls are in flight; further submissions
+    fail fast with SimulationPoolSaturated instead of queueing without
+    bound, so the event loop stays free for other requests.
+
+    If a worker dies (e.g. killed for running out of memory) the executor
+    is broken for good; it is then replaced by a fresh one, and run()
+    retries the call once.
+    """
+
+    def __init__(self, workers, queue_depth):
+        self.workers = workers
+        self.max_pending = max(workers, 1) + queue_depth
+        self.pending = 0
+        self._executor = None
+        self._manager = None
+
+    def start(self):
+        """
+        Launch and warm every worker up front. Workers are otherwise
+        spawned lazily on submit, which blocks the event loop for seconds.
+        """
+        executor = self._get_executor()
+        if executor is not None:
+            wait([executor.submit(_warm_worker) for _ in range(self.workers)])
+
+    def _get_context(self):
+        # Plain fork would copy the server's listening socket and threads
+        # into the workers; start them from a clean process
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("forkserver")
+            # Workers fork from a server that has already imported the
+            # engine (pandas, sklearn, numba)
+            context.set_forkserver_preload(["rtb_engine.campaign_simulator"])
+            return context
+
+        return multiprocessing.get_context("spawn")
+
+    def _get_executor(self):
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=self._get_context(),
+                initializer=_warm_worker
+            )
+        return self._executor
+
+    def channel(self):
+        """
+        (progress dict, cancel event) shared between the caller and a task
+        submitted to the pool: manager proxies when tasks run in worker
+        processes, plain objects when they run in-process.
+        """
+        if self.workers == 0:
+            return {}, threading.Event()
+
+        if self._manager is None:
+            self._manager = self._get_context().Manager()
+
+        return self._manager.dict(), self._manager.Event()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Schedule fn(*args, **kwargs) and return an awaitable future.
+        Raises SimulationPoolSaturated immediately when the pool is full.
+        """
+        if self.pending >= self.max_pending:
+            raise SimulationPoolSaturated(
+                f"{self.pending} simulations in flight, limit is {self.max_pending}"
+            )
+
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        executor = self._get_executor()
+
+        try:
+            future = loop.run_in_executor(executor, call)
+        except BrokenProcessPool:
+            self._discard(executor)
+            executor = self._get_executor()
+            future = loop.run_in_executor(executor, call)
+
+        self.pending += 1
+        future.add_done_callback(functools.partial(self._release, executor))
+        return future
+
+    def _release(self, executor, future):
+        self.pending -= 1
+
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard(executor)
+
+    def _discard(self, executor):
+        """Drop a broken executor so the next submit starts a new one."""
+
+        if executor is not None and executor is self._executor:
+            print("[pool] A simulation worker died; restarting the pool")
+            self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run(self, fn, *args, **kwargs):
+        try:
+            return await self.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            return await self.submit(fn, *args, **kwargs)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+
+simulation_pool = SimulationPool(SIMULATION_WORKERS, SIMULATION_QUEUE_DEPTH)
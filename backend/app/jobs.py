@@ -0,0 +1,143 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from uuid import uuid4
+
+from rtb_engine.campaign_simulator import SimulationCancelled, run_campaign_simulation
+
+from .config import JOB_CHUNK_ROWS, JOB_HISTORY
+from .executor import simulation_pool
+
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+
+# job id -> SimulationJob, oldest first
+jobs_db = OrderedDict()
+
+
+def _run_job(progress, cancel, params):
+    """Worker side of a job: a streamed replay reporting into progress."""
+
+    def report(rows_processed, total_spent):
+        progress.update(rows_processed=rows_processed, total_spent=total_spent)
+
+    progress["status"] = "running"
+    return run_campaign_simulation(progress=report, cancel=cancel, **params)
+
+
+class SimulationJob:
+    """A campaign simulation running in the background on the simulation pool."""
+
+    def __init__(self, campaign_id, strategy, total_rows, progress, cancel):
+        self.id = str(uuid4())
+        self.campaign_id = campaign_id
+        self.strategy = strategy
+        self.total_rows = total_rows
+        self.progress = progress
+        self.cancel_event = cancel
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = datetime.now()
+        self.finished_at = None
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATUSES
+
+    def snapshot(self):
+        """Current state as a plain dict (see models.Job)."""
+
+        progress = dict(self.progress)
+        status = self.status if self.finished else progress.get("status", self.status)
+
+        return {
+            "id": self.id,
+            "campaign_id": self.campaign_id,
+            "strategy": self.strategy,
+            "status": status,
+            "cancel_requested": not self.finished and self.cancel_event.is_set(),
+            "rows_processed": progress.get("rows_processed", 0),
+            "total_rows": self.total_rows,
+            "total_spent": round(progress.get("total_spent", 0), 2),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+            "metrics": self.result["metrics"] if self.result else None
+        }
+
+
+def submit_job(campaign_id, strategy, params, total_rows=None, on_complete=None):
+    """
+    Start run_campaign_simulation(**params) in the background and return
+    the job right away. on_complete(result) is called on success. Raises
+    SimulationPoolSaturated if the pool cannot take another task.
+    """
+
+    progress, cancel = simulation_pool.channel()
+    params = dict(params, chunk_size=JOB_CHUNK_ROWS)
+    future = simulation_pool.submit(_run_job, progress, cancel, params)
+
+    job = SimulationJob(campaign_id, strategy, total_rows, progress, cancel)
+    jobs_db[job.id] = job
+    _prune_jobs()
+
+    asyncio.ensure_future(_watch_job(job, future, on_complete))
+    return job
+
+
+def finished_job(campaign_id, strategy, result, total_rows=None):
+    """Record a job whose result is already known (e.g. from a cache)."""
+
+    job = SimulationJob(campaign_id, strategy, total_rows, {}, None)
+    job.result = result
+    job.status = "completed"
+    job.finished_at = job.created_at
+    job.progress = {
+        "rows_processed": total_rows or 0,
+        "total_spent": result["metrics"]["total_spent"]
+    }
+
+    jobs_db[job.id] = job
+    _prune_jobs()
+    return job
+
+
+async def _watch_job(job, future, on_complete):
+    try:
+        job.result = await future
+        job.status = "completed"
+        if on_complete is not None:
+            on_complete(job.result)
+    except SimulationCancelled:
+        job.status = "cancelled"
+    except Exception as e:
+        print(f"Error in simulation job {job.id}: {str(e)}")
+        job.error = str(e)
+        job.status = "failed"
+    finally:
+        # Keep the last progress locally and drop the shared proxies
+        job.progress = dict(job.progress)
+        job.finished_at = datetime.now()
+
+
+def get_job(job_id):
+    return jobs_db.get(job_id)
+
+
+def cancel_job(job_id):
+    """
+    Ask a job to stop. Running replays stop at the next chunk boundary,
+    queued ones as soon as a worker picks them up.
+    """
+
+    job = jobs_db.get(job_id)
+    if job is not None and not job.finished:
+        job.cancel_event.set()
+    return job
+
+
+def _prune_jobs():
+    finished = [job_id for job_id, job in jobs_db.items() if job.finished]
+    for job_id in finished[:max(len(finished) - JOB_HISTORY, 0)]:
+        del jobs_db[job_id]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional, Union
 from datetime import datetime
 
 
@@ -68,3 +68,79 @@ class SimulationResponse(BaseModel):
     strategy: str
     metrics: Metrics
     timestamp: datetime
+
+
+class SweepRequest(BaseModel):
+    total_budgets: List[float] = Field(..., alias="totalBudgets", min_items=1)
+    base_bids: List[float] = Field(..., alias="baseBids", min_items=1)
+    conversion_weights: List[int] = Field(..., alias="conversionWeights", min_items=1)
+    strategies: List[Literal["baseline", "optimized"]] = Field(..., min_items=1)
+    workers: Optional[int] = Field(None, ge=1, le=32)
+
+    class Config:
+        populate_by_name = True
+
+class SweepResponse(BaseModel):
+    columns: List[str]
+    rows: List[List[Union[int, float, str]]]
+
+
+class SharedAuctionRequest(BaseModel):
+    # Campaigns to put in the auction (default: every campaign)
+    campaign_ids: Optional[List[str]] = Field(None, alias="campaignIds", min_items=1)
+
+    class Config:
+        populate_by_name = True
+
+class AuctionStats(BaseModel):
+    rows: int
+    rows_with_bids: int
+    contested_rows: int
+    rows_won: int
+
+class SharedAuctionResult(BaseModel):
+    # One auction per impression log; None is the default dataset
+    dataset_path: Optional[str] = None
+    auction: AuctionStats
+    campaigns: Dict[str, Metrics]
+
+class SharedAuctionResponse(BaseModel):
+    results: List[SharedAuctionResult]
+    timestamp: datetime
+
+
+class Job(BaseModel):
+    id: str
+    campaign_id: str
+    strategy: str
+    status: Literal["queued", "running", "completed", "failed", "cancelled"]
+    cancel_requested: bool
+    rows_processed: int
+    total_rows: Optional[int] = None
+    total_spent: float
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    error: Optional[str] = None
+    metrics: Optional[Metrics] = None
+
+
+class BidRequest(BaseModel):
+    # Campaign feature of the impression (the models' campaign_id column)
+    campaign_id: int
+    hour: int = Field(..., ge=0, le=23)
+    device_type: int
+    floor_price: float = Field(..., ge=0)
+
+class BidResponse(BaseModel):
+    bid_id: Optional[str] = None
+    bid: float
+    no_bid_reason: Optional[Literal["targeting", "floor", "budget"]] = None
+
+class WinNotice(BaseModel):
+    bid_id: str
+    price: float = Field(..., ge=0)
+
+class WinResponse(BaseModel):
+    bid_id: str
+    price: float
+    remaining_budget: float
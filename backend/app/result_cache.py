@@ -0,0 +1,196 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from rtb_engine.dataset_loader import cached_fingerprint, dataset_fingerprint, dataset_source
+from rtb_engine.model_registry import model_version
+
+
+# Bump when the engine changes in a way that changes results, so entries
+# persisted by an older version are never served
+RESULT_CACHE_VERSION = 1
+
+
+def simulation_key(params, fingerprint=None):
+    """
+    Cache key for run_campaign_simulation(**params): a hash of the dataset
+    content and source (see dataset_source), the model version and the
+    campaign parameters. Parameters a
+    strategy does not use are left out (optimized ignores base_bid,
+    baseline ignores the models), so those runs share one entry.
+    fingerprint is the dataset's, when the caller already has it.
+    """
+
+    strategy = params["strategy"]
+    active_hours = params.get("active_hours")
+
+    dataset_path = params.get("dataset_path") or "data/train.csv"
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(dataset_path)
+
+    key = {
+        "version": RESULT_CACHE_VERSION,
+        "dataset": fingerprint,
+        "source": dataset_source(dataset_path),
+        "strategy": strategy,
+        "initial_budget": float(params["initial_budget"]),
+        "conversion_weight": float(params["conversion_weight"]),
+        "device_targeting": params["device_targeting"],
+        # Hours are a filter: order and duplicates do not matter
+        "active_hours": sorted(set(active_hours)) if active_hours else None
+    }
+
+    if strategy == "optimized":
+        key["model_version"] = model_version()
+    else:
+        key["base_bid"] = float(params["base_bid"])
+
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+async def fingerprint_async(path):
+    """dataset_fingerprint for async code: a cold hash runs on a thread."""
+
+    fingerprint = cached_fingerprint(path)
+    if fingerprint is None:
+        fingerprint = await asyncio.to_thread(dataset_fingerprint, path)
+    return fingerprint
+
+
+async def simulation_key_async(params):
+    """simulation_key without hashing the dataset on the event loop."""
+    fingerprint = await fingerprint_async(params.get("dataset_path") or "data/train.csv")
+    return simulation_key(params, fingerprint)
+
+
+class ResultCache:
+    """
+    LRU cache of simulation results keyed by simulation_key.
+
+    With a directory set, every result is also written there as JSON and
+    memory misses fall back to disk, so results survive restarts and are
+    shared by every process using the same directory.
+    """
+
+    def __init__(self, max_entries, directory=None, max_disk_entries=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+        result = self._read_disk(key)
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._store(key, result)
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._store(key, result)
+
+        self._write_disk(key, result)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+        if self.directory:
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def info(self):
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "directory": self.directory
+        }
+
+    def _store(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ===== DISK =====
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            with open(path) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Disk entries are evicted oldest mtime first
+        os.utime(path)
+        return result
+
+    def _write_disk(self, key, result):
+        if not self.directory:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        with open(tmp_path, "w") as f:
+            json.dump(result, f)
+        os.replace(tmp_path, path)
+
+        if self.max_disk_entries:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        files = [
+            entry for entry in os.scandir(self.directory)
+            if entry.name.endswith(".json")
+        ]
+        if len(files) <= self.max_disk_entries:
+            return
+
+        files.sort(key=lambda entry: entry.stat().st_mtime_ns)
+        for entry in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -1,5 +1,8 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from typing import List, Optional
 import os
 
@@ -10,23 +13,42 @@ from .models import (
     Analytics,
     SimulationRequest,
     SimulationResponse,
+    SweepRequest,
+    SweepResponse,
+    SharedAuctionRequest,
+    SharedAuctionResponse,
+    Job,
+    BidRequest,
+    BidResponse,
+    WinNotice,
+    WinResponse,
 )
 
-from .service import CampaignService
+from .service import CampaignService, simulation_cache
+from .executor import SimulationPoolSaturated, simulation_pool
+from .batcher import bid_batcher
 from rtb_engine.dataset_loader import load_dataset
+from rtb_engine.model_registry import model_version
 
 # Engine modules
 from rtb_engine.simulator import run_simulation as engine_run_simulation
 from rtb_engine.simulator import run_baseline
-from rtb_engine.eda import run_eda
 from rtb_engine.advanced_analytics import (
-    get_hourly_trend,
     get_market_price_histogram,
-    get_feature_importance,
-    get_model_confidence,
+    summary_eda,
+    summary_hourly_trend,
+    summary_market_price_histogram,
 )
 
-app = FastAPI(title="BidWise RTB API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Starting workers takes seconds; do it before serving requests
+    simulation_pool.start()
+    yield
+    simulation_pool.shutdown()
+
+
+app = FastAPI(title="BidWise RTB API", version="1.0.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,6 +58,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.exception_handler(SimulationPoolSaturated)
+async def simulation_pool_saturated(request: Request, exc: SimulationPoolSaturated):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Simulation capacity exhausted, retry shortly"},
+        headers={"Retry-After": "1"}
+    )
+
+
+
 # =================================================
 # CAMPAIGN CRUD
 # =================================================
@@ -59,16 +92,19 @@ async def create_campaign(
                 detail="Only CSV and Excel files (.csv, .xls, .xlsx) are supported"
             )
 
-    return await CampaignService.create_campaign(
-        campaignName,
-        totalBudget,
-        baseBid,
-        strategy,
-        conversionWeight,
-        deviceTargeting,
-        activeHours,
-        file
-    )
+    try:
+        return await CampaignService.create_campaign(
+            campaignName,
+            totalBudget,
+            baseBid,
+            strategy,
+            conversionWeight,
+            deviceTargeting,
+            activeHours,
+            file
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.get("/campaigns", response_model=List[Campaign])
@@ -84,6 +120,17 @@ async def get_campaign(campaign_id: str):
     return campaign
 
 
+@app.post("/campaigns/{campaign_id}/rows", response_model=Campaign)
+async def append_campaign_rows(campaign_id: str, file: UploadFile = File(...)):
+    campaign = CampaignService.get_campaign(campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    try:
+        return await CampaignService.append_rows(campaign_id, file)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.delete("/campaigns/{campaign_id}", status_code=204)
 async def delete_campaign(campaign_id: str):
     if not CampaignService.delete_campaign(campaign_id):
@@ -100,7 +147,7 @@ async def get_metrics(campaign_id: str):
     campaign = CampaignService.get_campaign(campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
-    return CampaignService.get_metrics(campaign_id)
+    return await CampaignService.get_metrics(campaign_id)
 
 
 @app.get("/campaigns/{campaign_id}/analytics", response_model=Analytics)
@@ -108,7 +155,7 @@ async def get_analytics(campaign_id: str):
     campaign = CampaignService.get_campaign(campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
-    return CampaignService.get_analytics(campaign_id)
+    return await CampaignService.get_analytics(campaign_id)
 
 
 @app.post("/campaigns/{campaign_id}/run-simulation", response_model=SimulationResponse)
@@ -116,93 +163,167 @@ async def run_campaign_simulation(campaign_id: str, request: SimulationRequest):
     campaign = CampaignService.get_campaign(campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
-    return CampaignService.run_simulation(campaign_id, request.strategy)
+    return await CampaignService.run_simulation(campaign_id, request.strategy)
+
+
+@app.post("/campaigns/{campaign_id}/sweep", response_model=SweepResponse)
+async def run_campaign_sweep(campaign_id: str, request: SweepRequest):
+    campaign = CampaignService.get_campaign(campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    try:
+        return await CampaignService.run_sweep(campaign_id, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/shared-auction", response_model=SharedAuctionResponse)
+async def run_shared_auction(request: Optional[SharedAuctionRequest] = None):
+    # Campaigns compete with each other for the same impressions
+    response = await CampaignService.run_shared_auction(request or SharedAuctionRequest())
+    if response is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return response
 
 
 # =================================================
-# 🔥 CAMPAIGN-SPECIFIC ENGINE ANALYTICS (NEW)
+# LIVE BIDDING
 # =================================================
 
-@app.get("/campaigns/{campaign_id}/eda")
-def campaign_eda(campaign_id: str):
-    campaign = CampaignService.get_campaign(campaign_id)
-    if not campaign:
+@app.post("/campaigns/{campaign_id}/bid", response_model=BidResponse)
+async def bid(campaign_id: str, request: BidRequest):
+    response = await CampaignService.bid(campaign_id, request)
+    if response is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
+    return response
 
-    # Use campaign-specific dataset if uploaded, otherwise use default
-    dataset_path = campaign.dataset_path if campaign.dataset_path else "data/train.csv"
-    print(f"[EDA] Campaign ID: {campaign_id}, Dataset Path: {dataset_path}")
-    df = load_dataset(dataset_path)
-    print(f"[EDA] Loaded {len(df)} rows from {dataset_path}")
-    
-    # Calculate EDA metrics from campaign-specific data
-    total_rows = len(df)
-    total_clicks = df["click"].sum()
-    total_conversions = df["conversion"].sum()
-    ctr = total_clicks / total_rows if total_rows else 0
-    cvr = total_conversions / total_rows if total_rows else 0
-    avg_market_price = df["market_price"].mean()
-    device_distribution = df["device_type"].value_counts(normalize=True).to_dict()
-    
-    result = {
-        "total_rows": int(total_rows),
-        "total_clicks": int(total_clicks),
-        "total_conversions": int(total_conversions),
-        "ctr": round(ctr, 4),
-        "cvr": round(cvr, 4),
-        "avg_market_price": round(avg_market_price, 2),
-        "device_distribution": device_distribution
-    }
-    print(f"[EDA] Result: {result}")
-    return result
 
+@app.post("/campaigns/{campaign_id}/win", response_model=WinResponse)
+async def win_notice(campaign_id: str, notice: WinNotice):
+    try:
+        response = CampaignService.win(campaign_id, notice)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Bid not found or already settled")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/campaigns/{campaign_id}/hourly")
-def campaign_hourly(campaign_id: str):
-    campaign = CampaignService.get_campaign(campaign_id)
-    if not campaign:
+    if response is None:
         raise HTTPException(status_code=404, detail="Campaign not found")
+    return response
 
-    # Use campaign-specific dataset if uploaded, otherwise use default
-    dataset_path = campaign.dataset_path if campaign.dataset_path else "data/train.csv"
-    df = load_dataset(dataset_path)
-    return get_hourly_trend(df)
 
+@app.get("/campaigns/{campaign_id}/bidding")
+async def bidding_stats(campaign_id: str):
+    stats = CampaignService.bidding_stats(campaign_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return stats
 
-@app.get("/campaigns/{campaign_id}/market-price")
-def campaign_market_price(campaign_id: str):
+
+@app.get("/bidding/batcher")
+async def bid_batcher_stats():
+    # Batch fill and queueing delay of the shared bid scorer
+    return bid_batcher.stats()
+
+
+# =================================================
+# BACKGROUND SIMULATION JOBS
+# =================================================
+
+@app.post("/campaigns/{campaign_id}/jobs", response_model=Job, status_code=202)
+async def submit_simulation_job(campaign_id: str, request: Optional[SimulationRequest] = None):
     campaign = CampaignService.get_campaign(campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
+    return await CampaignService.submit_job(campaign_id, request.strategy if request else None)
 
-    # Use campaign-specific dataset if uploaded, otherwise use default
-    dataset_path = campaign.dataset_path if campaign.dataset_path else "data/train.csv"
-    df = load_dataset(dataset_path)
-    return get_market_price_histogram(df)
 
+@app.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    job = CampaignService.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
 
-@app.get("/campaigns/{campaign_id}/feature-importance")
-def campaign_feature_importance(campaign_id: str):
+
+@app.post("/jobs/{job_id}/cancel", response_model=Job)
+async def cancel_job(job_id: str):
+    job = CampaignService.cancel_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+# =================================================
+# 🔥 CAMPAIGN-SPECIFIC ENGINE ANALYTICS (NEW)
+# =================================================
+
+def _campaign_insights(campaign_id: str) -> dict:
     campaign = CampaignService.get_campaign(campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
 
     # Use campaign-specific dataset if uploaded, otherwise use default
-    dataset_path = campaign.dataset_path if campaign.dataset_path else "data/train.csv"
-    df = load_dataset(dataset_path)
-    return get_feature_importance(df)
+    return CampaignService.get_insights(campaign.dataset_path)
 
 
-@app.get("/campaigns/{campaign_id}/confidence")
-def campaign_confidence(campaign_id: str):
+def _market_price(dataset_path: Optional[str], bins: Optional[str]):
+    """Cached default histogram, or one over custom comma-separated bin edges."""
+    if bins is None:
+        return CampaignService.get_insights(dataset_path)["market_price"]
+
+    try:
+        edges = [float(edge) for edge in bins.split(",")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bins must be comma-separated numbers")
+
+    if len(edges) < 2 or not all(low < high for low, high in zip(edges[:-1], edges[1:])):
+        raise HTTPException(status_code=400, detail="bins must be at least two increasing edges")
+
+    return get_market_price_histogram(load_dataset(dataset_path or "data/train.csv"), bins=edges)
+
+
+@app.get("/campaigns/{campaign_id}/insights")
+def campaign_insights(campaign_id: str):
+    """EDA, hourly trend, market price, feature importance and confidence in one response."""
+    return _campaign_insights(campaign_id)
+
+
+@app.get("/campaigns/{campaign_id}/eda")
+def campaign_eda(campaign_id: str):
+    summary = CampaignService.get_dataset_summary(campaign_id)
+    if summary:
+        return summary_eda(summary)
+    return _campaign_insights(campaign_id)["eda"]
+
+
+@app.get("/campaigns/{campaign_id}/hourly")
+def campaign_hourly(campaign_id: str):
+    summary = CampaignService.get_dataset_summary(campaign_id)
+    if summary:
+        return summary_hourly_trend(summary)
+    return _campaign_insights(campaign_id)["hourly"]
+
+
+@app.get("/campaigns/{campaign_id}/market-price")
+def campaign_market_price(campaign_id: str, bins: Optional[str] = None):
     campaign = CampaignService.get_campaign(campaign_id)
     if not campaign:
         raise HTTPException(status_code=404, detail="Campaign not found")
+    summary = CampaignService.get_dataset_summary(campaign_id)
+    if bins is None and summary:
+        return summary_market_price_histogram(summary)
+    return _market_price(campaign.dataset_path, bins)
 
-    # Use campaign-specific dataset if uploaded, otherwise use default
-    dataset_path = campaign.dataset_path if campaign.dataset_path else "data/train.csv"
-    df = load_dataset(dataset_path)
-    return get_model_confidence(df)
+
+@app.get("/campaigns/{campaign_id}/feature-importance")
+def campaign_feature_importance(campaign_id: str):
+    return _campaign_insights(campaign_id)["feature_importance"]
+
+
+@app.get("/campaigns/{campaign_id}/confidence")
+def campaign_confidence(campaign_id: str):
+    return _campaign_insights(campaign_id)["confidence"]
 
 
 # =================================================
@@ -219,34 +340,34 @@ def optimized():
     return engine_run_simulation()
 
 
+@app.get("/insights")
+def insights():
+    return CampaignService.get_insights()
+
+
 @app.get("/eda")
 def eda():
-    df = load_dataset("data/train.csv")
-    return run_eda()
+    return CampaignService.get_insights()["eda"]
 
 
 @app.get("/analytics/hourly")
 def analytics_hourly():
-    df = load_dataset("data/train.csv")
-    return get_hourly_trend(df)
+    return CampaignService.get_insights()["hourly"]
 
 
 @app.get("/analytics/market-price")
-def analytics_market_price():
-    df = load_dataset("data/train.csv")
-    return get_market_price_histogram(df)
+def analytics_market_price(bins: Optional[str] = None):
+    return _market_price(None, bins)
 
 
 @app.get("/analytics/feature-importance")
 def analytics_feature_importance():
-    df = load_dataset("data/train.csv")
-    return get_feature_importance(df)
+    return CampaignService.get_insights()["feature_importance"]
 
 
 @app.get("/analytics/confidence")
 def analytics_confidence():
-    df = load_dataset("data/train.csv")
-    return get_model_confidence(df)
+    return CampaignService.get_insights()["confidence"]
 
 
 # =================================================
@@ -255,4 +376,10 @@ def analytics_confidence():
 
 @app.get("/health")
 def health():
-    return {"status": "healthy"}
\ No newline at end of file
+    return {
+        "status": "healthy",
+        "model_version": model_version(),
+        "simulation_pool": simulation_pool.stats(),
+        "result_cache": simulation_cache.info(),
+        "bid_batcher": bid_batcher.stats()
+    }
\ No newline at end of file
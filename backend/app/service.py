@@ -1,3 +1,5 @@
+import asyncio
+import threading
 from datetime import datetime
 from uuid import uuid4
 from typing import Dict, Optional
@@ -14,17 +16,104 @@ from .models import (
     DevicePerformance,
     FeatureImportance,
     SimulationResponse,
+    SweepRequest,
+    SweepResponse,
+    SharedAuctionRequest,
+    SharedAuctionResponse,
+    Job,
+    BidRequest,
+    BidResponse,
+    WinNotice,
+    WinResponse,
 )
 
-from rtb_engine.campaign_simulator import run_campaign_simulation
+from rtb_engine.campaign_simulator import (
+    build_sweep_grid,
+    run_campaign_simulation,
+    run_parameter_sweep,
+    run_shared_auction,
+)
+from rtb_engine.advanced_analytics import (
+    get_campaign_insights,
+    merge_dataset_summaries,
+    summarize_dataset,
+)
+from rtb_engine.dataset_loader import (
+    append_dataset_rows,
+    dataset_fingerprint,
+    dataset_row_count,
+    dataset_source,
+    ingest_dataset,
+    load_dataset,
+    remove_dataset,
+)
+from rtb_engine.model_registry import model_version
+from rtb_engine.score_cache import get_scores
+
+from .config import (
+    INSIGHTS_CACHE_ENTRIES,
+    RESULT_CACHE_DIR,
+    RESULT_CACHE_DISK_ENTRIES,
+    RESULT_CACHE_ENTRIES,
+)
+from .batcher import bid_batcher
+from .bidding import CampaignBidder
+from .executor import SimulationPoolSaturated, simulation_pool
+from .result_cache import ResultCache, simulation_key, simulation_key_async
+from . import jobs
 
 # Updated to support Excel files
 
 # In-memory storage
 campaigns_db: Dict[str, Campaign] = {}
 
-# Cache for simulation results
-simulation_cache: Dict[str, dict] = {}
+# Mergeable summaries of uploaded datasets (see summarize_dataset) by
+# campaign id; kept out of Campaign so responses stay small
+dataset_summaries: Dict[str, dict] = {}
+
+# Simulation results keyed by simulation_key (dataset content, model
+# version and parameters), shared by every campaign
+simulation_cache = ResultCache(
+    RESULT_CACHE_ENTRIES,
+    directory=RESULT_CACHE_DIR,
+    max_disk_entries=RESULT_CACHE_DISK_ENTRIES
+)
+
+# Simulations currently running, so concurrent identical requests share one run
+simulation_inflight: Dict[str, asyncio.Future] = {}
+
+# Fused dataset analytics (EDA, hourly, market price, feature importance,
+# confidence) keyed by dataset content and model version
+insights_cache = ResultCache(INSIGHTS_CACHE_ENTRIES)
+insights_lock = threading.Lock()
+
+# Live bidding state per campaign, created on the first bid request
+live_bidders: Dict[str, CampaignBidder] = {}
+
+# One lock per campaign, so appends to its dataset never interleave
+append_locks: Dict[str, asyncio.Lock] = {}
+
+# Upper bound on configurations evaluated by one sweep request
+MAX_SWEEP_CONFIGURATIONS = 5000
+
+
+def _ingest_upload(dataset_path):
+    """
+    Normalize an uploaded dataset once and keep a binary copy, so
+    simulations never re-parse the CSV/Excel upload, and return its
+    summary, from which the EDA endpoints answer without reading the data.
+    """
+    ingest_dataset(dataset_path)
+    return summarize_dataset(load_dataset(dataset_path))
+
+
+def _append_upload(dataset_path, content, summary):
+    """Append CSV rows to a dataset; returns its updated summary."""
+    rows = append_dataset_rows(dataset_path, content)
+
+    if summary is not None:
+        return merge_dataset_summaries(summary, summarize_dataset(rows))
+    return summarize_dataset(load_dataset(dataset_path))
 
 
 class CampaignService:
@@ -44,6 +133,7 @@ class CampaignService:
         active_hours = json.loads(active_hours_str)
         
         dataset_path = None
+        dataset_summary = None
         if file:
             os.makedirs("data/campaigns", exist_ok=True)
             _, ext = os.path.splitext(file.filename)
@@ -52,6 +142,15 @@ class CampaignService:
                 content = await file.read()
                 f.write(content)
 
+            # Parsing a large upload takes a while: keep it off the event loop
+            try:
+                dataset_summary = await asyncio.to_thread(_ingest_upload, dataset_path)
+            except Exception as e:
+                remove_dataset(dataset_path)
+                if isinstance(e, OSError):
+                    raise
+                raise ValueError(f"Could not read the uploaded dataset: {e}") from e
+
         campaign = Campaign(
             id=campaign_id,
             campaign_name=campaign_name,
@@ -67,62 +166,112 @@ class CampaignService:
         )
 
         campaigns_db[campaign_id] = campaign
+        if dataset_summary is not None:
+            dataset_summaries[campaign_id] = dataset_summary
         return campaign
 
     @staticmethod
     def get_campaign(campaign_id: str) -> Optional[Campaign]:
         return campaigns_db.get(campaign_id)
 
+    @staticmethod
+    async def append_rows(campaign_id: str, file: UploadFile) -> Optional[Campaign]:
+        """
+        Append uploaded CSV rows to the campaign's dataset and fold their
+        summary into the stored one instead of re-summarizing everything.
+        """
+        campaign = campaigns_db.get(campaign_id)
+        if not campaign:
+            return None
+
+        if not campaign.dataset_path:
+            raise ValueError("Campaign uses the default dataset; upload a dataset to append rows")
+
+        content = await file.read()
+
+        # Appends rewrite the CSV and its column store: one at a time per
+        # campaign, and off the event loop
+        async with append_locks.setdefault(campaign_id, asyncio.Lock()):
+            dataset_summaries[campaign_id] = await asyncio.to_thread(
+                _append_upload, campaign.dataset_path, content, dataset_summaries.get(campaign_id)
+            )
+
+        return campaign
+
+    @staticmethod
+    def get_dataset_summary(campaign_id: str) -> Optional[dict]:
+        """Summary of the campaign's uploaded dataset, if it has one."""
+        return dataset_summaries.get(campaign_id)
+
     @staticmethod
     def get_all_campaigns():
         return list(campaigns_db.values())
 
     @staticmethod
-    def get_metrics(campaign_id: str) -> Metrics:
+    def _simulation_params(campaign: Campaign, strategy: Optional[str] = None) -> dict:
+        return {
+            "initial_budget": campaign.total_budget,
+            "base_bid": campaign.base_bid,
+            "strategy": strategy or campaign.strategy,
+            "conversion_weight": campaign.conversion_weight,
+            "device_targeting": campaign.device_targeting,
+            "active_hours": campaign.active_hours,
+            "dataset_path": campaign.dataset_path
+        }
+
+    @staticmethod
+    async def _simulate(campaign: Campaign, strategy: Optional[str] = None) -> dict:
+        """
+        Campaign simulation result from the result cache, or run on the
+        simulation pool and cached. Identical requests in flight at the
+        same time wait for a single run.
+        """
+        params = CampaignService._simulation_params(campaign, strategy)
+        key = await simulation_key_async(params)
+
+        result = simulation_cache.get(key)
+        if result is not None:
+            return result
+
+        run = simulation_inflight.get(key)
+        if run is None:
+            run = asyncio.ensure_future(simulation_pool.run(run_campaign_simulation, **params))
+            simulation_inflight[key] = run
+
+            def store(future):
+                simulation_inflight.pop(key, None)
+                if not future.cancelled() and future.exception() is None:
+                    simulation_cache.put(key, future.result())
+
+            run.add_done_callback(store)
+
+        return await asyncio.shield(run)
+
+    @staticmethod
+    async def get_metrics(campaign_id: str) -> Metrics:
         campaign = campaigns_db.get(campaign_id)
         if not campaign:
             return None
-        
-        # Check cache first
-        if campaign_id not in simulation_cache:
-            try:
-                result = run_campaign_simulation(
-                    initial_budget=campaign.total_budget,
-                    base_bid=campaign.base_bid,
-                    strategy=campaign.strategy,
-                    conversion_weight=campaign.conversion_weight,
-                    device_targeting=campaign.device_targeting,
-                    active_hours=campaign.active_hours,
-                    dataset_path=campaign.dataset_path
-                )
-                simulation_cache[campaign_id] = result
-            except Exception as e:
-                print(f"Error in get_metrics for campaign {campaign_id}: {str(e)}")
-                raise
-        
-        metrics_data = simulation_cache[campaign_id]["metrics"]
+
+        try:
+            result = await CampaignService._simulate(campaign)
+        except SimulationPoolSaturated:
+            raise
+        except Exception as e:
+            print(f"Error in get_metrics for campaign {campaign_id}: {str(e)}")
+            raise
+
+        metrics_data = result["metrics"]
         return Metrics(**metrics_data)
 
     @staticmethod
-    def get_analytics(campaign_id: str) -> Analytics:
+    async def get_analytics(campaign_id: str) -> Analytics:
         campaign = campaigns_db.get(campaign_id)
         if not campaign:
             return None
-        
-        # Check cache first
-        if campaign_id not in simulation_cache:
-            result = run_campaign_simulation(
-                initial_budget=campaign.total_budget,
-                base_bid=campaign.base_bid,
-                strategy=campaign.strategy,
-                conversion_weight=campaign.conversion_weight,
-                device_targeting=campaign.device_targeting,
-                active_hours=campaign.active_hours,
-                dataset_path=campaign.dataset_path
-            )
-            simulation_cache[campaign_id] = result
-        
-        analytics_data = simulation_cache[campaign_id]["analytics"]
+
+        result = await CampaignService._simulate(campaign)
+        analytics_data = result["analytics"]
         
         return Analytics(
             hourly_performance=[HourlyPerformance(**hp) for hp in analytics_data["hourly_performance"]],
@@ -131,50 +280,221 @@ class CampaignService:
         )
 
     @staticmethod
-    def run_simulation(campaign_id: str, strategy: str) -> SimulationResponse:
+    async def run_simulation(campaign_id: str, strategy: str) -> SimulationResponse:
         campaign = campaigns_db.get(campaign_id)
         if not campaign:
             return None
-        
-        # Clear cache to force re-simulation
-        if campaign_id in simulation_cache:
-            del simulation_cache[campaign_id]
-        
-        # Update strategy temporarily for this simulation
-        original_strategy = campaign.strategy
-        campaign.strategy = strategy
-        
-        metrics = CampaignService.get_metrics(campaign_id)
-        
-        # Restore original strategy
-        campaign.strategy = original_strategy
-        
-        # Clear cache again
-        if campaign_id in simulation_cache:
-            del simulation_cache[campaign_id]
+
+        result = await CampaignService._simulate(campaign, strategy)
         
         return SimulationResponse(
             strategy=strategy,
-            metrics=metrics,
+            metrics=Metrics(**result["metrics"]),
             timestamp=datetime.now(),
         )
 
+    @staticmethod
+    def get_insights(dataset_path: Optional[str] = None) -> dict:
+        """
+        All dataset analytics behind the dashboard, computed in one pass
+        and cached until the dataset content or the models change.
+        """
+        dataset_path = dataset_path or "data/train.csv"
+        key = f"{dataset_fingerprint(dataset_path)}:{dataset_source(dataset_path)}:{model_version()}"
+
+        insights = insights_cache.get(key)
+        if insights is None:
+            # Dashboard sections are requested together; compute them once
+            with insights_lock:
+                insights = insights_cache.get(key)
+                if insights is None:
+                    df = load_dataset(dataset_path)
+                    try:
+                        scores = get_scores(dataset_path)
+                    except Exception as e:
+                        # Confidence falls back to its own defaults
+                        print(f"Score cache error for {dataset_path}: {str(e)}")
+                        scores = None
+                    insights = get_campaign_insights(df, scores)
+                    insights_cache.put(key, insights)
+
+        return insights
+
+    @staticmethod
+    async def submit_job(campaign_id: str, strategy: Optional[str] = None) -> Job:
+        """Start a background simulation and return its job right away."""
+        campaign = campaigns_db.get(campaign_id)
+        if not campaign:
+            return None
+
+        strategy = strategy or campaign.strategy
+        params = CampaignService._simulation_params(campaign, strategy)
+        key = await simulation_key_async(params)
+        total_rows = dataset_row_count(campaign.dataset_path or "data/train.csv")
+
+        result = simulation_cache.get(key)
+        if result is not None:
+            return Job(**jobs.finished_job(campaign_id, strategy, result, total_rows).snapshot())
+
+        job = jobs.submit_job(
+            campaign_id,
+            strategy,
+            params,
+            total_rows=total_rows,
+            on_complete=lambda result: simulation_cache.put(key, result)
+        )
+        return Job(**job.snapshot())
+
+    @staticmethod
+    def get_job(job_id: str) -> Optional[Job]:
+        job = jobs.get_job(job_id)
+        return Job(**job.snapshot()) if job else None
+
+    @staticmethod
+    def cancel_job(job_id: str) -> Optional[Job]:
+        job = jobs.cancel_job(job_id)
+        return Job(**job.snapshot()) if job else None
+
+    @staticmethod
+    async def run_sweep(campaign_id: str, request: SweepRequest) -> SweepResponse:
+        """Evaluate a grid of budgets, bids, weights and strategies against the campaign's dataset and targeting."""
+        campaign = campaigns_db.get(campaign_id)
+        if not campaign:
+            return None
+
+        configurations = build_sweep_grid(
+            request.total_budgets,
+            request.base_bids,
+            request.conversion_weights,
+            request.strategies
+        )
+        if len(configurations) > MAX_SWEEP_CONFIGURATIONS:
+            raise ValueError(
+                f"Sweep has {len(configurations)} configurations, "
+                f"the maximum is {MAX_SWEEP_CONFIGURATIONS}"
+            )
+
+        result = await simulation_pool.run(
+            run_parameter_sweep,
+            configurations,
+            device_targeting=campaign.device_targeting,
+            active_hours=campaign.active_hours,
+            dataset_path=campaign.dataset_path,
+            workers=request.workers
+        )
+        return SweepResponse(**result)
+
+    @staticmethod
+    async def run_shared_auction(request: SharedAuctionRequest) -> Optional[SharedAuctionResponse]:
+        """
+        Replay campaigns against each other in one shared auction per
+        dataset. Returns None if a requested campaign does not exist.
+        """
+        campaign_ids = request.campaign_ids or list(campaigns_db)
+        if any(campaign_id not in campaigns_db for campaign_id in campaign_ids):
+            return None
+
+        # Campaigns only compete for impressions of the same log
+        groups: Dict[Optional[str], list] = {}
+        for campaign_id in dict.fromkeys(campaign_ids):
+            campaign = campaigns_db[campaign_id]
+            groups.setdefault(campaign.dataset_path, []).append({
+                "id": campaign.id,
+                "total_budget": campaign.total_budget,
+                "base_bid": campaign.base_bid,
+                "strategy": campaign.strategy,
+                "conversion_weight": campaign.conversion_weight,
+                "device_targeting": campaign.device_targeting,
+                "active_hours": campaign.active_hours
+            })
+
+        runs = await asyncio.gather(*[
+            simulation_pool.run(run_shared_auction, configs, dataset_path=dataset_path)
+            for dataset_path, configs in groups.items()
+        ])
+
+        return SharedAuctionResponse(
+            results=[
+                {
+                    "dataset_path": dataset_path,
+                    "auction": run["auction"],
+                    "campaigns": {
+                        campaign_id: result["metrics"]
+                        for campaign_id, result in run["campaigns"].items()
+                    }
+                }
+                for dataset_path, run in zip(groups, runs)
+            ],
+            timestamp=datetime.now()
+        )
+
+    @staticmethod
+    def _get_bidder(campaign_id: str) -> Optional[CampaignBidder]:
+        bidder = live_bidders.get(campaign_id)
+        if bidder is None:
+            campaign = campaigns_db.get(campaign_id)
+            if not campaign:
+                return None
+            bidder = live_bidders[campaign_id] = CampaignBidder(campaign)
+        return bidder
+
+    @staticmethod
+    async def bid(campaign_id: str, request: BidRequest) -> Optional[BidResponse]:
+        """Price one bid request against the campaign's live budget."""
+        bidder = CampaignService._get_bidder(campaign_id)
+        if bidder is None:
+            return None
+
+        if bid_batcher.enabled:
+            bid_id, result = await bidder.bid_batched(
+                request.campaign_id, request.hour, request.device_type, request.floor_price, bid_batcher
+            )
+        else:
+            bid_id, result = bidder.bid(
+                request.campaign_id, request.hour, request.device_type, request.floor_price
+            )
+        if bid_id is None:
+            return BidResponse(bid=0.0, no_bid_reason=result)
+        return BidResponse(bid_id=bid_id, bid=result)
+
+    @staticmethod
+    def win(campaign_id: str, notice: WinNotice) -> Optional[WinResponse]:
+        """Deduct the clearing price of a won bid. Raises KeyError / ValueError."""
+        bidder = CampaignService._get_bidder(campaign_id)
+        if bidder is None:
+            return None
+
+        remaining = bidder.win(notice.bid_id, notice.price)
+        return WinResponse(bid_id=notice.bid_id, price=notice.price, remaining_budget=remaining)
+
+    @staticmethod
+    def bidding_stats(campaign_id: str) -> Optional[dict]:
+        bidder = CampaignService._get_bidder(campaign_id)
+        return bidder.stats() if bidder else None
+
     @staticmethod
     def delete_campaign(campaign_id: str) -> bool:
         """Delete a campaign by ID. Returns True if deleted, False if not found."""
         if campaign_id in campaigns_db:
+            # Cached results are keyed by content and parameters, not by
+            # campaign, and stay valid for other campaigns
             del campaigns_db[campaign_id]
-            # Clear cache
-            if campaign_id in simulation_cache:
-                del simulation_cache[campaign_id]
+            dataset_summaries.pop(campaign_id, None)
+            append_locks.pop(campaign_id, None)
+            bidder = live_bidders.pop(campaign_id, None)
+            if bidder is not None:
+                bidder.close()
             return True
         return False
     
     @staticmethod
     def clear_cache(campaign_id: str = None):
-        """Clear simulation cache for a specific campaign or all campaigns."""
+        """Clear cached simulation results for a specific campaign or all campaigns."""
         if campaign_id:
-            if campaign_id in simulation_cache:
-                del simulation_cache[campaign_id]
+            campaign = campaigns_db.get(campaign_id)
+            if campaign:
+                for strategy in ("baseline", "optimized"):
+                    params = CampaignService._simulation_params(campaign, strategy)
+                    simulation_cache.discard(simulation_key(params))
         else:
             simulation_cache.clear()
@@ -0,0 +1,215 @@
+"""
+Load test for the live bidding endpoints.
+
+Replays bid requests sampled from data/train.csv against a running API
+(POST /campaigns/{id}/bid, plus win notices for a share of the bids) and
+reports throughput, throughput per server worker and latency percentiles.
+
+    uvicorn app.routes:app --port 8000 --workers 4
+    python benchmarks/bid_load.py --url http://127.0.0.1:8000 --workers 4
+
+--in-process skips HTTP and drives CampaignService.bid directly from
+--concurrency coroutines, which is the request path's own cost. Set
+BIDWISE_BID_BATCHING=always / never to compare micro-batched scoring
+with per-request scoring; the batcher's fill and queueing delay are
+included in the report.
+
+Run from backend/. Live budgets are per server process unless
+BIDWISE_BUDGET_LEDGER points every worker at one shared ledger file.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_requests(path, count, seed=0):
+    """Bid request bodies built from dataset rows, sampled with replacement."""
+
+    with open(path, newline="") as f:
+        rows = [
+            {
+                "campaign_id": int(float(row["campaign_id"])),
+                "hour": int(float(row["hour"])),
+                "device_type": int(float(row["device_type"])),
+                "floor_price": float(row["floor_price"])
+            }
+            for row in csv.DictReader(f)
+        ]
+
+    rng = random.Random(seed)
+    return [rng.choice(rows) for _ in range(count)]
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+
+    def pick(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "p99_ms": round(pick(0.99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3)
+    }
+
+
+# ===== HTTP =====
+
+async def create_campaign(client, budget, base_bid):
+    response = await client.post("/create-campaign", data={
+        "campaignName": "bid-load-test",
+        "totalBudget": budget,
+        "baseBid": base_bid,
+        "strategy": "optimized",
+        "conversionWeight": 5,
+        "deviceTargeting": "all",
+        "activeHours": "[]"
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+async def run_http(args, requests):
+    try:
+        import httpx
+    except ImportError:
+        sys.exit("HTTP mode needs httpx (pip install httpx); --in-process runs without it")
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+        campaign_id = args.campaign or await create_campaign(client, args.budget, args.base_bid)
+
+        rng = random.Random(1)
+        latencies = []
+        outcomes = {"bid": 0, "no_bid": 0, "win": 0, "error": 0}
+        queue = iter(requests)
+
+        async def worker():
+            for body in queue:
+                start = time.perf_counter()
+                response = await client.post(f"/campaigns/{campaign_id}/bid", json=body)
+                latencies.append(time.perf_counter() - start)
+
+                if response.status_code != 200:
+                    outcomes["error"] += 1
+                    continue
+
+                result = response.json()
+                if result["bid_id"] is None:
+                    outcomes["no_bid"] += 1
+                    continue
+
+                outcomes["bid"] += 1
+                if rng.random() < args.win_rate:
+                    # Second-price style clearing at the floor
+                    notice = {"bid_id": result["bid_id"], "price": body["floor_price"]}
+                    response = await client.post(f"/campaigns/{campaign_id}/win", json=notice)
+                    outcomes["win" if response.status_code == 200 else "error"] += 1
+
+        # Warm up connections and the server's caches
+        for body in requests[:50]:
+            await client.post(f"/campaigns/{campaign_id}/bid", json=body)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+        elapsed = time.perf_counter() - start
+
+        stats = (await client.get(f"/campaigns/{campaign_id}/bidding")).json()
+        batcher = (await client.get("/bidding/batcher")).json()
+
+    return elapsed, latencies, outcomes, stats, batcher
+
+
+# ===== IN-PROCESS =====
+
+async def run_in_process(args, requests):
+    from datetime import datetime
+
+    from app.batcher import bid_batcher
+    from app.models import BidRequest, Campaign
+    from app.service import CampaignService, campaigns_db
+
+    campaign = Campaign(
+        id="bid-load-test",
+        campaign_name="bid-load-test",
+        total_budget=args.budget,
+        base_bid=args.base_bid,
+        strategy="optimized",
+        conversion_weight=5,
+        device_targeting="all",
+        active_hours=[],
+        status="active",
+        created_at=datetime.now()
+    )
+    campaigns_db[campaign.id] = campaign
+
+    bodies = [BidRequest(**body) for body in requests]
+    for body in bodies[:50]:
+        await CampaignService.bid(campaign.id, body)
+
+    latencies = []
+    outcomes = {"bid": 0, "no_bid": 0, "win": 0, "error": 0}
+    queue = iter(bodies)
+
+    async def worker():
+        for body in queue:
+            t = time.perf_counter()
+            response = await CampaignService.bid(campaign.id, body)
+            latencies.append(time.perf_counter() - t)
+            outcomes["no_bid" if response.bid_id is None else "bid"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    elapsed = time.perf_counter() - start
+
+    return elapsed, latencies, outcomes, CampaignService.bidding_stats(campaign.id), bid_batcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--campaign", help="existing campaign id (default: create one)")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes, for per-worker throughput")
+    parser.add_argument("--win-rate", type=float, default=0.1, help="share of bids that get a win notice")
+    parser.add_argument("--budget", type=float, default=1e9)
+    parser.add_argument("--base-bid", type=float, default=100)
+    parser.add_argument("--dataset", default="data/train.csv")
+    parser.add_argument("--in-process", action="store_true", help="time CampaignService.bid without HTTP")
+    args = parser.parse_args()
+
+    requests = load_requests(args.dataset, args.requests)
+
+    run = run_in_process if args.in_process else run_http
+    elapsed, latencies, outcomes, stats, batcher = asyncio.run(run(args, requests))
+
+    throughput = len(latencies) / elapsed
+    print(json.dumps({
+        "mode": "in-process" if args.in_process else "http",
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "workers": args.workers,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(throughput, 1),
+        "throughput_per_worker_rps": round(throughput / max(args.workers, 1), 1),
+        "latency": percentiles(latencies),
+        "outcomes": outcomes,
+        "campaign": stats,
+        "batcher": batcher
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Stress test for the live budget ledger.
+
+Many threads (or processes) bid concurrently against a few hot
+campaigns: each op reserves a random bid, then either wins it (commit at
+a random clearing price up to the bid) or loses it (release). At the end
+every campaign must have spent at most its budget, hold no reservations,
+and its spend must equal the sum of the commits the workers made, i.e.
+no overspend and no lost updates. Exits non-zero if any check fails.
+
+    python benchmarks/ledger_stress.py --mode threads
+    python benchmarks/ledger_stress.py --mode processes --workers 8
+    python benchmarks/ledger_stress.py --mode threads --unsafe
+
+--unsafe runs the same load through a plain BudgetManager (separate
+can_bid / deduct) to show the overspend the ledger prevents.
+
+Run from backend/.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rtb_engine.budget_ledger import BudgetLedger, SharedBudgetLedger, to_micros
+from rtb_engine.budget_manager import BudgetManager
+
+
+def campaign_ids(count):
+    return [f"stress-{i}" for i in range(count)]
+
+
+def bid_loop(ledger, campaigns, ops, win_rate, max_bid, seed):
+    """Run ops reserve/commit/release rounds; returns micro-units committed per campaign."""
+
+    rng = random.Random(seed)
+    committed = dict.fromkeys(campaigns, 0)
+
+    for _ in range(ops):
+        campaign_id = rng.choice(campaigns)
+        bid = round(rng.uniform(0.01, max_bid), 6)
+
+        if not ledger.reserve(campaign_id, bid):
+            continue
+
+        if rng.random() < win_rate:
+            price = round(rng.uniform(0, bid), 6)
+            ledger.commit(campaign_id, bid, price)
+            committed[campaign_id] += to_micros(price)
+        else:
+            ledger.release(campaign_id, bid)
+
+    return committed
+
+
+def _process_worker(path, campaigns, ops, win_rate, max_bid, seed, results):
+    # Each process maps the ledger file on its own
+    ledger = SharedBudgetLedger(path)
+    results.put(bid_loop(ledger, campaigns, ops, win_rate, max_bid, seed))
+
+
+def run_ledger(args):
+    campaigns = campaign_ids(args.campaigns)
+    path = None
+
+    if args.mode == "processes" or args.shared:
+        path = os.path.join(tempfile.mkdtemp(prefix="ledger-stress-"), "budget.ledger")
+        ledger = SharedBudgetLedger(path)
+    else:
+        ledger = BudgetLedger()
+
+    for campaign_id in campaigns:
+        ledger.open(campaign_id, args.budget)
+
+    start = time.perf_counter()
+
+    if args.mode == "processes":
+        results = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(
+                target=_process_worker,
+                args=(path, campaigns, args.ops, args.win_rate, args.max_bid, seed, results)
+            )
+            for seed in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        reports = [results.get() for _ in workers]
+        for worker in workers:
+            worker.join()
+
+    else:
+        reports = []
+
+        def run(seed):
+            reports.append(bid_loop(ledger, campaigns, args.ops, args.win_rate, args.max_bid, seed))
+
+        threads = [threading.Thread(target=run, args=(seed,)) for seed in range(args.workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    elapsed = time.perf_counter() - start
+
+    checks = {}
+    for campaign_id in campaigns:
+        balance = ledger.balance(campaign_id)
+        expected = sum(report[campaign_id] for report in reports)
+
+        checks[campaign_id] = {
+            "spent": balance["spent"],
+            "budget_used": round(balance["spent"] / args.budget, 4),
+            "no_overspend": to_micros(balance["spent"]) <= to_micros(args.budget),
+            "no_reservations_left": balance["reserved"] == 0,
+            "no_lost_updates": to_micros(balance["spent"]) == expected
+        }
+
+    return elapsed, checks
+
+
+def run_unsafe(args):
+    """The same load through BudgetManager's separate check and deduct."""
+
+    campaigns = campaign_ids(args.campaigns)
+    managers = {campaign_id: BudgetManager(args.budget) for campaign_id in campaigns}
+
+    # Switch threads as often as possible to expose the check-then-act race
+    sys.setswitchinterval(1e-6)
+
+    def run(seed):
+        rng = random.Random(seed)
+        for _ in range(args.ops):
+            manager = managers[rng.choice(campaigns)]
+            bid = round(rng.uniform(0.01, args.max_bid), 6)
+            if manager.can_bid(bid) and rng.random() < args.win_rate:
+                manager.deduct(round(rng.uniform(0, bid), 6))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(args.workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    checks = {
+        campaign_id: {
+            "spent": round(args.budget - manager.remaining_budget, 6),
+            "no_overspend": manager.remaining_budget >= 0
+        }
+        for campaign_id, manager in managers.items()
+    }
+    return elapsed, checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["threads", "processes"], default="threads")
+    parser.add_argument("--shared", action="store_true", help="use the file-backed ledger with threads too")
+    parser.add_argument("--unsafe", action="store_true", help="run plain BudgetManager instead (threads)")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=20000, help="bid rounds per worker")
+    parser.add_argument("--campaigns", type=int, default=4)
+    parser.add_argument("--budget", type=float, default=5000)
+    parser.add_argument("--max-bid", type=float, default=5)
+    parser.add_argument("--win-rate", type=float, default=0.3)
+    args = parser.parse_args()
+
+    if args.unsafe:
+        elapsed, checks = run_unsafe(args)
+    else:
+        elapsed, checks = run_ledger(args)
+
+    total_ops = args.workers * args.ops
+    passed = all(all(v for k, v in check.items() if k.startswith("no_")) for check in checks.values())
+
+    print(json.dumps({
+        "ledger": "BudgetManager" if args.unsafe else (
+            "SharedBudgetLedger" if args.mode == "processes" or args.shared else "BudgetLedger"
+        ),
+        "mode": "threads" if args.unsafe else args.mode,
+        "workers": args.workers,
+        "ops": total_ops,
+        "seconds": round(elapsed, 3),
+        "ops_per_second": round(total_ops / elapsed, 1),
+        "campaigns": checks,
+        "passed": passed
+    }, indent=2))
+
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+Benchmark suite for the simulation, analytics, loading and scoring hot
+paths.
+
+Synthetic logs of each size are made with dataset_generator (once, then
+reused from --workdir). Every case runs in a fresh process whose working
+directory holds that log as data/train.csv (and data/train.xlsx for
+sizes up to --excel-max-rows), with an empty score cache and no column
+store, so the first call is a cold run (parsing and model inference
+included). The following --repeats calls are warm runs against
+the caches the first one filled.
+
+    python benchmarks/suite.py --sizes 50000,1000000,10000000 --out bench.json
+    python benchmarks/suite.py --sizes 50000 --save-baseline benchmarks/baseline.json
+    python benchmarks/suite.py --sizes 50000 --baseline benchmarks/baseline.json
+
+Each result reports the cold time, warm p50 / p99 latency, rows per
+second (rows / warm p50) and the peak RSS of its process. With
+--baseline, warm p50 and peak RSS are compared with the saved results,
+and the exit code is 1 if any case is slower (or larger) than the
+baseline by more than --tolerance.
+
+Run from backend/.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: peak RSS is not reported
+    resource = None
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+DEFAULT_SIZES = [50000, 1000000, 10000000]
+
+# Single-request scoring is timed per call over this many requests
+PREDICT_CALLS = 1000
+
+
+# ===== CASES =====
+#
+# name -> (formats, setup). setup(path) runs untimed in the case's process
+# and returns (call, rows per call); call() is what gets timed.
+
+def _load_dataset(path):
+    from rtb_engine.dataset_loader import load_dataset
+    return lambda: load_dataset(path), None
+
+
+def _predict(method):
+    def setup(path):
+        from rtb_engine.dataset_loader import load_dataset
+        from rtb_engine.predicator import Predictor
+
+        df = load_dataset(path)
+        requests = df[["campaign_id", "hour", "device_type", "floor_price", "market_price"]]
+        requests = requests.head(PREDICT_CALLS).to_dict("records")
+        predict = getattr(Predictor(), method)
+        cycle = itertools.cycle(requests)
+
+        return lambda: predict(next(cycle)), 1
+    return setup
+
+
+def _predict_batch(path):
+    from rtb_engine.dataset_loader import load_dataset
+    from rtb_engine.predicator import Predictor
+
+    df = load_dataset(path)
+    predictor = Predictor()
+    return lambda: predictor.predict_batch(df), len(df)
+
+
+def _run_simulation(path):
+    from rtb_engine import simulator
+    return simulator.run_simulation, None
+
+
+def _run_baseline(path):
+    from rtb_engine import simulator
+    return simulator.run_baseline, None
+
+
+def _campaign(strategy):
+    def setup(path):
+        from rtb_engine.campaign_simulator import run_campaign_simulation
+        return lambda: run_campaign_simulation(strategy=strategy, dataset_path=path), None
+    return setup
+
+
+def _analytics(name):
+    def setup(path):
+        from rtb_engine import advanced_analytics
+        from rtb_engine.dataset_loader import load_dataset
+
+        df = load_dataset(path)
+        function = getattr(advanced_analytics, name)
+        return lambda: function(df), len(df)
+    return setup
+
+
+CASES = {
+    "load_dataset": (["csv", "excel"], _load_dataset),
+    "predictor.predict": (["csv"], _predict("predict")),
+    "predictor.predict_ctr": (["csv"], _predict("predict_ctr")),
+    "predictor.predict_batch": (["csv"], _predict_batch),
+    "simulator.run_simulation": (["csv"], _run_simulation),
+    "simulator.run_baseline": (["csv"], _run_baseline),
+    "campaign_simulation.optimized": (["csv", "excel"], _campaign("optimized")),
+    "campaign_simulation.baseline": (["csv", "excel"], _campaign("baseline")),
+    "analytics.get_campaign_insights": (["csv"], _analytics("get_campaign_insights")),
+    "analytics.summarize_dataset": (["csv"], _analytics("summarize_dataset")),
+    "analytics.get_hourly_trend": (["csv"], _analytics("get_hourly_trend")),
+    "analytics.get_market_price_histogram": (["csv"], _analytics("get_market_price_histogram"))
+}
+
+FILE_NAMES = {"csv": "data/train.csv", "excel": "data/train.xlsx"}
+
+
+# ===== DATASETS =====
+
+def prepare_workdir(workdir, rows, excel_max_rows):
+    """Directory with data/train.csv (and .xlsx) of rows rows and the models."""
+
+    from rtb_engine.dataset_generator import generate_dataset
+
+    size_dir = os.path.join(workdir, str(rows))
+    os.makedirs(os.path.join(size_dir, "data"), exist_ok=True)
+
+    csv_path = os.path.join(size_dir, FILE_NAMES["csv"])
+    if not os.path.exists(csv_path):
+        print(f"[bench] Generating {rows} rows", file=sys.stderr)
+        generate_dataset(n_rows=rows, save_path=csv_path)
+
+    excel_path = os.path.join(size_dir, FILE_NAMES["excel"])
+    if rows <= excel_max_rows and not os.path.exists(excel_path):
+        import pandas as pd
+        print(f"[bench] Writing {rows} rows to Excel", file=sys.stderr)
+        pd.read_csv(csv_path).to_excel(excel_path, index=False)
+
+    models = os.path.join(size_dir, "models")
+    if not os.path.exists(models):
+        os.symlink(os.path.join(BACKEND_DIR, "models"), models)
+
+    return size_dir
+
+
+def reset_caches(size_dir):
+    """Remove the persisted caches a previous case left in size_dir."""
+
+    from rtb_engine.column_store import store_path_for
+
+    shutil.rmtree(os.path.join(size_dir, "data", "scores"), ignore_errors=True)
+    for file_name in FILE_NAMES.values():
+        shutil.rmtree(store_path_for(os.path.join(size_dir, file_name)), ignore_errors=True)
+
+
+# ===== MEASUREMENT =====
+
+def peak_rss_mb():
+    # VmHWM starts over at exec; ru_maxrss can carry the parent's RSS at fork
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_case(case, file_format, rows, repeats):
+    """Time one case in this process (run from the size's directory)."""
+
+    _, setup = CASES[case]
+    call, rows_per_call = setup(FILE_NAMES[file_format])
+    rows_per_call = rows if rows_per_call is None else rows_per_call
+    calls = PREDICT_CALLS if rows_per_call == 1 else repeats
+
+    start = time.perf_counter()
+    call()
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        call()
+        warm.append(time.perf_counter() - start)
+
+    p50 = statistics.median(warm)
+    return {
+        "case": case,
+        "format": file_format,
+        "rows": rows,
+        "calls": calls,
+        "cold_ms": round(cold * 1000, 3),
+        "warm_p50_ms": round(p50 * 1000, 3),
+        "warm_p99_ms": round(percentile(warm, 0.99) * 1000, 3),
+        "rows_per_second": round(rows_per_call / p50, 1) if p50 else None,
+        "cold_rows_per_second": round(rows_per_call / cold, 1) if cold else None,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def run_case_process(size_dir, case, file_format, rows, repeats):
+    """Run one case in a fresh interpreter with cold caches."""
+
+    reset_caches(size_dir)
+
+    env = dict(os.environ, BIDWISE_SCORE_CACHE_DIR="data/scores")
+    completed = subprocess.run(
+        [
+            sys.executable, os.path.abspath(__file__),
+            "--run-case", case,
+            "--format", file_format,
+            "--rows", str(rows),
+            "--repeats", str(repeats)
+        ],
+        cwd=size_dir,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+
+    if completed.returncode != 0:
+        return {
+            "case": case,
+            "format": file_format,
+            "rows": rows,
+            "error": completed.stderr.strip().splitlines()[-1:] or ["failed"]
+        }
+
+    # The result is the last line; model loading may print before it
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+# ===== BASELINE =====
+
+def result_key(result):
+    return f"{result['case']}/{result['format']}/{result['rows']}"
+
+
+def compare(results, baseline, tolerance):
+    """Warm p50 and peak RSS of each result relative to the baseline's."""
+
+    previous = {result_key(r): r for r in baseline["results"] if "error" not in r}
+    comparison = {}
+
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None or "error" in result:
+            continue
+
+        entry = {"warm_p50_ratio": round(result["warm_p50_ms"] / before["warm_p50_ms"], 3)}
+        if result["peak_rss_mb"] and before.get("peak_rss_mb"):
+            entry["peak_rss_ratio"] = round(result["peak_rss_mb"] / before["peak_rss_mb"], 3)
+
+        entry["regression"] = any(ratio > 1 + tolerance for ratio in entry.values())
+        comparison[result_key(result)] = entry
+
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated row counts")
+    parser.add_argument("--cases", default=None, help="comma-separated case names (default: all)")
+    parser.add_argument("--formats", default="csv,excel")
+    parser.add_argument("--repeats", type=int, default=10, help="warm calls per case")
+    parser.add_argument("--workdir", default="benchmarks/.work", help="where generated logs are kept")
+    parser.add_argument("--excel-max-rows", type=int, default=50000, help="largest size also run from Excel")
+    parser.add_argument("--out", default=None, help="write the report here as well as to stdout")
+    parser.add_argument("--baseline", default=None, help="report to compare against")
+    parser.add_argument("--save-baseline", default=None, help="also save the report as a baseline here")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    parser.add_argument("--run-case", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--format", default="csv", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(args.run_case, args.format, args.rows, args.repeats)))
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    cases = args.cases.split(",") if args.cases else list(CASES)
+    formats = args.formats.split(",")
+
+    unknown = [case for case in cases if case not in CASES]
+    if unknown:
+        parser.error(f"Unknown cases: {', '.join(unknown)}")
+
+    workdir = os.path.abspath(args.workdir)
+    results = []
+
+    for rows in sizes:
+        size_dir = prepare_workdir(workdir, rows, args.excel_max_rows)
+
+        for case in cases:
+            for file_format in CASES[case][0]:
+                if file_format not in formats:
+                    continue
+                if file_format == "excel" and rows > args.excel_max_rows:
+                    continue
+
+                print(f"[bench] {case} {file_format} {rows}", file=sys.stderr)
+                results.append(run_case_process(size_dir, case, file_format, rows, args.repeats))
+
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeats": args.repeats,
+        "results": results
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["comparison"] = compare(results, json.load(f), args.tolerance)
+        regressions = [key for key, entry in report["comparison"].items() if entry["regression"]]
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2)
+    print(text)
+
+    for path in (args.out, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                f.write(text)
+
+    failed = any("error" in result for result in results)
+    sys.exit(1 if regressions or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
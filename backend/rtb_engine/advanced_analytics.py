@@ -1,6 +1,23 @@
 import pandas as pd
 import numpy as np
-import joblib
+from rtb_engine import model_registry
+
+
+# Integer keys spanning at most this many values are counted with a
+# dense bincount, anything else goes through np.unique
+MAX_DENSE_KEYS = 4096
+
+
+def _group_codes(values):
+    """(labels, codes) with labels[codes] == values, like a groupby key."""
+
+    if len(values) and values.dtype.kind in "iu":
+        low, high = int(values.min()), int(values.max())
+        if high - low < MAX_DENSE_KEYS:
+            return np.arange(low, high + 1), values.astype(np.int64) - low
+
+    labels, codes = np.unique(values, return_inverse=True)
+    return labels, codes
 
 
 # =========================================================
@@ -13,18 +30,19 @@ def get_hourly_trend(df: pd.DataFrame):
     if df.empty:
         return []
 
-    hourly = df.groupby('hour').agg({
-        'click': 'sum',
-        'conversion': 'sum'
-    }).reset_index()
+    labels, codes = _group_codes(df['hour'].to_numpy())
+    rows = np.bincount(codes, minlength=len(labels))
+    clicks = np.bincount(codes, weights=df['click'].to_numpy(), minlength=len(labels))
+    conversions = np.bincount(codes, weights=df['conversion'].to_numpy(), minlength=len(labels))
 
+    # Only hours that occur in the data, like a groupby
     return [
         {
-            "hour": int(row['hour']),
-            "clicks": int(row['click']),
-            "conversions": int(row['conversion'])
+            "hour": int(labels[i]),
+            "clicks": int(clicks[i]),
+            "conversions": int(conversions[i])
         }
-        for _, row in hourly.iterrows()
+        for i in np.flatnonzero(rows)
     ]
 
 
@@ -32,31 +50,46 @@ def get_hourly_trend(df: pd.DataFrame):
 # MARKET PRICE HISTOGRAM (Campaign Specific)
 # =========================================================
 
-def get_market_price_histogram(df: pd.DataFrame):
-    """Get market price distribution in bins (dynamic dataset)"""
+MARKET_PRICE_BINS = [0, 2, 4, 6, 8, float('inf')]
+
+
+def _edge_label(edge):
+    edge = float(edge)
+    return str(int(edge)) if edge.is_integer() else repr(edge)
+
+
+def market_price_labels(bins):
+    """Range labels for bin edges: [0, 2.5, inf] -> ['0-2.5', '2.5+']"""
+    return [
+        f"{_edge_label(low)}+" if high == float('inf') else f"{_edge_label(low)}-{_edge_label(high)}"
+        for low, high in zip(bins[:-1], bins[1:])
+    ]
+
+
+def get_market_price_histogram(df: pd.DataFrame, bins=None):
+    """
+    Get market price distribution in bins (dynamic dataset).
+    bins are increasing edges; each bin is [edge_i, edge_i+1) and prices
+    outside every bin are not counted. Defaults to MARKET_PRICE_BINS.
+    """
 
     if df.empty:
         return []
 
-    bins = [0, 2, 4, 6, 8, float('inf')]
-    labels = ['0-2', '2-4', '4-6', '6-8', '8+']
+    bins = MARKET_PRICE_BINS if bins is None else list(bins)
+    labels = market_price_labels(bins)
 
-    df = df.copy()
-    df['price_bin'] = pd.cut(
-        df['market_price'],
-        bins=bins,
-        labels=labels,
-        right=False
-    )
-
-    counts = df['price_bin'].value_counts().sort_index()
+    edges = np.asarray(bins, dtype=np.float64)
+    codes = np.searchsorted(edges, df['market_price'].to_numpy(), side="right") - 1
+    codes = codes[(codes >= 0) & (codes < len(labels))]
+    counts = np.bincount(codes, minlength=len(labels))
 
     return [
         {
-            "range": str(label),
-            "count": int(counts.get(label, 0))
+            "range": label,
+            "count": int(count)
         }
-        for label in labels
+        for label, count in zip(labels, counts)
     ]
 
 
@@ -68,7 +101,7 @@ def get_feature_importance(df: pd.DataFrame):
     """Get feature importance from CTR model"""
 
     try:
-        model = joblib.load("models/ctr_model.pkl")
+        model = model_registry.get_model(model_registry.CTR_MODEL_PATH)
 
         # IMPORTANT: Must match training features
         feature_names = [
@@ -114,8 +147,12 @@ def get_feature_importance(df: pd.DataFrame):
 # MODEL CONFIDENCE (Dynamic Dataset)
 # =========================================================
 
-def get_model_confidence(df: pd.DataFrame):
-    """Get model confidence scores (prediction certainty)"""
+def get_model_confidence(df: pd.DataFrame, scores=None):
+    """
+    Get model confidence scores (prediction certainty).
+    scores are optional precomputed (ctr, cvr) arrays for the rows of df
+    (see score_cache.get_scores), used instead of running the models.
+    """
 
     try:
         if df.empty:
@@ -124,20 +161,23 @@ def get_model_confidence(df: pd.DataFrame):
                 "avg_cvr_confidence": 0
             }
 
-        ctr_model = joblib.load("models/ctr_model.pkl")
-        cvr_model = joblib.load("models/cvr_model.pkl")
+        if scores is not None:
+            ctr_proba = np.asarray(scores[0][:1000])
+            cvr_proba = np.asarray(scores[1][:1000])
+        else:
+            ctr_model, cvr_model = model_registry.get_models()
 
-        # Must match model training features
-        features = df[[
-            'campaign_id',
-            'hour',
-            'device_type',
-            'floor_price',
-            'market_price'
-        ]].head(1000)
+            # Must match model training features
+            features = df[[
+                'campaign_id',
+                'hour',
+                'device_type',
+                'floor_price',
+                'market_price'
+            ]].head(1000)
 
-        ctr_proba = ctr_model.predict_proba(features)[:, 1]
-        cvr_proba = cvr_model.predict_proba(features)[:, 1]
+            ctr_proba = ctr_model.predict_proba(features)[:, 1]
+            cvr_proba = cvr_model.predict_proba(features)[:, 1]
 
         ctr_confidence = np.mean(np.maximum(ctr_proba, 1 - ctr_proba))
         cvr_confidence = np.mean(np.maximum(cvr_proba, 1 - cvr_proba))
@@ -153,4 +193,174 @@ def get_model_confidence(df: pd.DataFrame):
         return {
             "avg_ctr_confidence": 0.75,
             "avg_cvr_confidence": 0.70
-        }
\ No newline at end of file
+        }
+
+# =========================================================
+# FUSED CAMPAIGN INSIGHTS (All Dashboard Analytics)
+# =========================================================
+
+def get_campaign_insights(df: pd.DataFrame, scores=None):
+    """
+    EDA summary, hourly trend, market price histogram, feature importance
+    and model confidence in one call, every aggregate computed with
+    bincount / searchsorted on the column arrays instead of groupby /
+    value_counts / cut. Each section has the same shape as its endpoint.
+    scores are optional precomputed (ctr, cvr) arrays for the rows of df.
+    """
+
+    total_rows = len(df)
+    click = df["click"].to_numpy()
+    conversion = df["conversion"].to_numpy()
+
+    total_clicks = int(click.sum())
+    total_conversions = int(conversion.sum())
+
+    # Device share, most common first
+    device_distribution = {}
+    if total_rows:
+        labels, codes = _group_codes(df["device_type"].to_numpy())
+        counts = np.bincount(codes, minlength=len(labels))
+        for i in np.argsort(-counts, kind="stable"):
+            if counts[i]:
+                device_distribution[labels[i].item()] = counts[i] / total_rows
+
+    return {
+        "eda": {
+            "total_rows": int(total_rows),
+            "total_clicks": total_clicks,
+            "total_conversions": total_conversions,
+            "ctr": round(total_clicks / total_rows, 4) if total_rows else 0,
+            "cvr": round(total_conversions / total_rows, 4) if total_rows else 0,
+            "avg_market_price": round(float(df["market_price"].mean()), 2) if total_rows else 0,
+            "device_distribution": device_distribution
+        },
+        "hourly": get_hourly_trend(df),
+        "market_price": get_market_price_histogram(df),
+        "feature_importance": get_feature_importance(df),
+        "confidence": get_model_confidence(df, scores)
+    }
+
+
+# =========================================================
+# DATASET SUMMARY SKETCHES (Mergeable, Stored Per Campaign)
+# =========================================================
+
+def summarize_dataset(df: pd.DataFrame):
+    """
+    Mergeable summary of a dataset: row / click / conversion totals, the
+    market price sum and per-hour, per-device and price-bin histograms.
+    Plain JSON-friendly dict; summaries of appended rows are combined
+    with merge_dataset_summaries and the EDA, hourly trend and default
+    histogram are answered from it without reading the data again.
+    """
+
+    summary = {
+        "rows": int(len(df)),
+        "clicks": 0.0,
+        "conversions": 0.0,
+        "market_price_sum": 0.0,
+        "market_price_count": 0,
+        "hours": [],
+        "devices": [],
+        "market_price_bins": [0] * (len(MARKET_PRICE_BINS) - 1)
+    }
+
+    if df.empty:
+        return summary
+
+    click = df["click"].to_numpy()
+    conversion = df["conversion"].to_numpy()
+    market_price = df["market_price"].to_numpy()
+
+    summary["clicks"] = float(click.sum())
+    summary["conversions"] = float(conversion.sum())
+    summary["market_price_sum"] = float(np.nansum(market_price, dtype=np.float64))
+    summary["market_price_count"] = int(np.count_nonzero(~np.isnan(market_price)))
+
+    # [hour, rows, clicks, conversions] for every hour present
+    labels, codes = _group_codes(df["hour"].to_numpy())
+    rows = np.bincount(codes, minlength=len(labels))
+    clicks = np.bincount(codes, weights=click, minlength=len(labels))
+    conversions = np.bincount(codes, weights=conversion, minlength=len(labels))
+    summary["hours"] = [
+        [labels[i].item(), int(rows[i]), float(clicks[i]), float(conversions[i])]
+        for i in np.flatnonzero(rows)
+    ]
+
+    # [device, rows] for every device present
+    labels, codes = _group_codes(df["device_type"].to_numpy())
+    rows = np.bincount(codes, minlength=len(labels))
+    summary["devices"] = [[labels[i].item(), int(rows[i])] for i in np.flatnonzero(rows)]
+
+    summary["market_price_bins"] = [
+        entry["count"] for entry in get_market_price_histogram(df)
+    ]
+
+    return summary
+
+
+def _merge_histogram(first, second):
+    merged = {}
+    for entry in first + second:
+        counts = merged.setdefault(entry[0], [0] * (len(entry) - 1))
+        for i, value in enumerate(entry[1:]):
+            counts[i] += value
+    return [[key, *counts] for key, counts in sorted(merged.items())]
+
+
+def merge_dataset_summaries(first, second):
+    """Summary of the concatenation of the two summarized datasets."""
+    return {
+        "rows": first["rows"] + second["rows"],
+        "clicks": first["clicks"] + second["clicks"],
+        "conversions": first["conversions"] + second["conversions"],
+        "market_price_sum": first["market_price_sum"] + second["market_price_sum"],
+        "market_price_count": first["market_price_count"] + second["market_price_count"],
+        "hours": _merge_histogram(first["hours"], second["hours"]),
+        "devices": _merge_histogram(first["devices"], second["devices"]),
+        "market_price_bins": [
+            a + b for a, b in zip(first["market_price_bins"], second["market_price_bins"])
+        ]
+    }
+
+
+def summary_eda(summary):
+    """EDA section (see get_campaign_insights) from a dataset summary."""
+
+    total_rows = summary["rows"]
+    total_clicks = int(summary["clicks"])
+    total_conversions = int(summary["conversions"])
+    price_count = summary["market_price_count"]
+
+    # Most common device first, like value_counts
+    devices = sorted(summary["devices"], key=lambda entry: -entry[1])
+
+    return {
+        "total_rows": total_rows,
+        "total_clicks": total_clicks,
+        "total_conversions": total_conversions,
+        "ctr": round(total_clicks / total_rows, 4) if total_rows else 0,
+        "cvr": round(total_conversions / total_rows, 4) if total_rows else 0,
+        "avg_market_price": round(summary["market_price_sum"] / price_count, 2) if price_count else 0,
+        "device_distribution": {device: rows / total_rows for device, rows in devices}
+    }
+
+
+def summary_hourly_trend(summary):
+    """get_hourly_trend output from a dataset summary."""
+    return [
+        {"hour": int(hour), "clicks": int(clicks), "conversions": int(conversions)}
+        for hour, _, clicks, conversions in summary["hours"]
+    ]
+
+
+def summary_market_price_histogram(summary):
+    """get_market_price_histogram output (default bins) from a dataset summary."""
+
+    if not summary["rows"]:
+        return []
+
+    return [
+        {"range": label, "count": count}
+        for label, count in zip(market_price_labels(MARKET_PRICE_BINS), summary["market_price_bins"])
+    ]
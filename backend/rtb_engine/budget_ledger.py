@@ -0,0 +1,334 @@
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process ledger is available
+    fcntl = None
+
+
+# Amounts are kept as integer micro-units so concurrent updates from any
+# number of threads or processes add up exactly
+MICROS = 1_000_000
+
+
+def to_micros(amount):
+    return int(round(amount * MICROS))
+
+
+def from_micros(micros):
+    return micros / MICROS
+
+
+class LedgerAccount:
+    """
+    One campaign's budget in a ledger. Drop-in for BudgetManager where
+    pacing only reads the budget (initial_budget, remaining_budget,
+    get_budget_factor); spending goes through reserve / commit / release.
+    """
+
+    def __init__(self, ledger, campaign_id, initial_budget):
+        self.ledger = ledger
+        self.campaign_id = campaign_id
+        self.initial_budget = initial_budget
+
+    @property
+    def remaining_budget(self):
+        return self.ledger.remaining(self.campaign_id)
+
+    def get_budget_factor(self):
+        return self.remaining_budget / self.initial_budget
+
+    def reserve(self, amount):
+        return self.ledger.reserve(self.campaign_id, amount)
+
+    def commit(self, reserved, amount):
+        return self.ledger.commit(self.campaign_id, reserved, amount)
+
+    def release(self, amount):
+        self.ledger.release(self.campaign_id, amount)
+
+    def balance(self):
+        return self.ledger.balance(self.campaign_id)
+
+
+class BudgetLedger:
+    """
+    Thread-safe campaign budgets with atomic reserve / commit / release.
+
+    reserve(amount) succeeds only if the budget minus everything already
+    spent or reserved covers it, so bids that may still win can never add
+    up to more than the budget. commit(reserved, amount) settles a
+    reservation at its actual cost (at most the reserved amount) and
+    release(amount) returns an unused one. Each campaign has its own lock,
+    so bidding on one campaign never waits for another.
+
+    Each account is a (total, spent, reserved) triple of micro-units;
+    subclasses only change where triples are stored and how they are
+    locked (see SharedBudgetLedger).
+    """
+
+    def __init__(self):
+        self._accounts = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    # ===== STORAGE =====
+
+    def _create(self, campaign_id, total):
+        with self._lock:
+            if campaign_id not in self._accounts:
+                self._accounts[campaign_id] = [total, 0, 0]
+                self._locks[campaign_id] = threading.Lock()
+
+    def _remove(self, campaign_id):
+        with self._lock:
+            self._accounts.pop(campaign_id, None)
+            self._locks.pop(campaign_id, None)
+
+    @contextmanager
+    def _locked(self, campaign_id):
+        """
+        Lock one account and yield [total, spent, reserved]; changes made
+        to the list are kept when the block exits.
+        """
+
+        lock = self._locks.get(campaign_id)
+        if lock is None:
+            raise KeyError(campaign_id)
+
+        with lock:
+            yield self._accounts[campaign_id]
+
+    # ===== ACCOUNTS =====
+
+    def open(self, campaign_id, total_budget):
+        """
+        LedgerAccount for a campaign, creating it with total_budget if it
+        does not exist yet. An existing account keeps its spending.
+        """
+
+        self._create(campaign_id, to_micros(total_budget))
+        return LedgerAccount(self, campaign_id, total_budget)
+
+    def close(self, campaign_id):
+        self._remove(campaign_id)
+
+    def reserve(self, campaign_id, amount):
+        """Hold amount for a pending bid; False if the budget cannot cover it."""
+
+        micros = to_micros(amount)
+        with self._locked(campaign_id) as record:
+            total, spent, reserved = record
+            if total - spent - reserved < micros:
+                return False
+            record[2] = reserved + micros
+            return True
+
+    def commit(self, campaign_id, reserved_amount, amount):
+        """
+        Settle a reservation of reserved_amount at cost amount; the rest of
+        the reservation is released. Returns the remaining budget.
+        """
+
+        held = to_micros(reserved_amount)
+        cost = to_micros(amount)
+        if cost > held:
+            raise ValueError(f"Cost {amount} exceeds the reserved {reserved_amount}")
+
+        with self._locked(campaign_id) as record:
+            if record[2] < held:
+                raise ValueError(f"Nothing reserved for {reserved_amount}")
+            record[1] += cost
+            record[2] -= held
+            return from_micros(record[0] - record[1])
+
+    def release(self, campaign_id, amount):
+        """Return a reservation that will not be spent (lost or expired bid)."""
+
+        held = to_micros(amount)
+        with self._locked(campaign_id) as record:
+            record[2] -= min(held, record[2])
+
+    def remaining(self, campaign_id):
+        """Budget not yet spent (reservations included)."""
+        with self._locked(campaign_id) as record:
+            return from_micros(record[0] - record[1])
+
+    def balance(self, campaign_id):
+        with self._locked(campaign_id) as record:
+            total, spent, reserved = record
+
+        return {
+            "total": from_micros(total),
+            "spent": from_micros(spent),
+            "reserved": from_micros(reserved),
+            "remaining": from_micros(total - spent),
+            "available": from_micros(total - spent - reserved)
+        }
+
+
+class SharedBudgetLedger(BudgetLedger):
+    """
+    BudgetLedger stored in a memory-mapped file, shared by every process
+    that opens the same path (e.g. several uvicorn workers).
+
+    The file is a fixed table of slots, one per open campaign, found by
+    hashing the campaign id; slots of closed campaigns are reused. Each slot is guarded by an fcntl byte-range lock on
+    its own bytes (between processes) and a striped thread lock (within a
+    process), so campaigns never contend with each other.
+    """
+
+    MAGIC = b"BWLEDGR1"
+    HEADER = struct.Struct("<8sq48x")
+    # key (16 bytes), state, total, spent, reserved, padding to 64 bytes
+    SLOT = struct.Struct("<16sqqqq8x")
+
+    EMPTY, OPEN, CLOSED = 0, 1, 2
+
+    # Thread locks shared by slots (slot index modulo this)
+    THREAD_STRIPES = 64
+
+    def __init__(self, path, slots=65536):
+        if fcntl is None:
+            raise RuntimeError("SharedBudgetLedger needs fcntl (POSIX); use BudgetLedger")
+
+        self.path = path
+        self._stripes = [threading.Lock() for _ in range(self.THREAD_STRIPES)]
+        self._table_lock = threading.Lock()
+        self._slot_of = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._file_lock(0, self.HEADER.size):
+            size = os.fstat(self._fd).st_size
+            if size == 0:
+                os.ftruncate(self._fd, self.HEADER.size + slots * self.SLOT.size)
+                os.pwrite(self._fd, self.HEADER.pack(self.MAGIC, slots), 0)
+
+            magic, self.slots = self.HEADER.unpack(os.pread(self._fd, self.HEADER.size, 0))
+            if magic != self.MAGIC:
+                raise ValueError(f"Not a budget ledger file: {path}")
+
+        self._map = mmap.mmap(self._fd, self.HEADER.size + self.slots * self.SLOT.size)
+
+    @contextmanager
+    def _file_lock(self, offset, length):
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, length, offset)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, length, offset)
+
+    def _offset(self, slot):
+        return self.HEADER.size + slot * self.SLOT.size
+
+    def _read(self, slot):
+        return self.SLOT.unpack_from(self._map, self._offset(slot))
+
+    def _write(self, slot, key, state, total, spent, reserved):
+        self.SLOT.pack_into(self._map, self._offset(slot), key, state, total, spent, reserved)
+
+    # ===== STORAGE =====
+
+    @staticmethod
+    def _key(campaign_id):
+        return hashlib.blake2b(campaign_id.encode(), digest_size=16).digest()
+
+    def _find(self, campaign_id, create_total=None):
+        """
+        Slot of an open account (linear probing from the id's hash). With
+        create_total, the account is created if it is missing, in the
+        first closed slot on its probe path or else the empty slot that
+        ends it, so slots of closed campaigns are reused.
+        """
+
+        key = self._key(campaign_id)
+        start = int.from_bytes(key[:8], "little") % self.slots
+        free = None
+
+        # Claiming a slot must not race with other processes doing the same
+        with self._table_lock, self._file_lock(0, self.HEADER.size):
+            for i in range(self.slots):
+                slot = (start + i) % self.slots
+                slot_key, state, *_ = self._read(slot)
+
+                if state == self.OPEN and slot_key == key:
+                    return slot
+                if state == self.CLOSED and free is None:
+                    free = slot
+                if state == self.EMPTY:
+                    if free is None:
+                        free = slot
+                    break
+
+            if create_total is None or free is None:
+                if create_total is not None:
+                    raise RuntimeError(f"Budget ledger {self.path} is full ({self.slots} campaigns)")
+                return None
+
+            with self._slot_lock(free):
+                self._write(free, key, self.OPEN, create_total, 0, 0)
+            return free
+
+    def _holds(self, slot, key):
+        # Unlocked hint only: callers re-check under the slot lock
+        slot_key, state, *_ = self._read(slot)
+        return slot_key == key and state == self.OPEN
+
+    def _create(self, campaign_id, total):
+        self._slot_of[campaign_id] = self._find(campaign_id, create_total=total)
+
+    def _remove(self, campaign_id):
+        key = self._key(campaign_id)
+        slot = self._slot_of.pop(campaign_id, None)
+        if slot is None or not self._holds(slot, key):
+            slot = self._find(campaign_id)
+        if slot is None:
+            return
+
+        # Closed slots keep their place so probing past them still works,
+        # until a new account claims them
+        with self._slot_lock(slot):
+            slot_key, state, total, spent, reserved = self._read(slot)
+            if slot_key == key and state == self.OPEN:
+                self._write(slot, key, self.CLOSED, total, spent, reserved)
+
+    @contextmanager
+    def _slot_lock(self, slot):
+        with self._stripes[slot % self.THREAD_STRIPES]:
+            with self._file_lock(self._offset(slot), self.SLOT.size):
+                yield
+
+    @contextmanager
+    def _locked(self, campaign_id):
+        key = self._key(campaign_id)
+        slot = self._slot_of.get(campaign_id)
+        if slot is None or not self._holds(slot, key):
+            # Account opened by another process, or its slot was closed
+            # (and possibly reused) since this process last saw it
+            slot = self._find(campaign_id)
+            if slot is None:
+                self._slot_of.pop(campaign_id, None)
+                raise KeyError(campaign_id)
+            self._slot_of[campaign_id] = slot
+
+        with self._slot_lock(slot):
+            slot_key, state, *record = self._read(slot)
+            if slot_key != key or state != self.OPEN:
+                raise KeyError(campaign_id)
+
+            yield record
+            self._write(slot, key, state, *record)
+
+    def close_file(self):
+        """Unmap the ledger file (accounts in it are kept)."""
+        self._map.close()
+        os.close(self._fd)
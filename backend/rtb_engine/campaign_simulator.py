@@ -1,7 +1,26 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-from rtb_engine.predicator import Predictor
 from rtb_engine.budget_manager import BudgetManager
-from rtb_engine.dataset_loader import load_dataset
+from rtb_engine.dataset_loader import iter_dataset_chunks, load_columns
+from rtb_engine.dataset_view import DatasetView
+from rtb_engine.replay import (
+    REPLAY_COLUMNS,
+    AuctionBidders,
+    ReplayColumns,
+    merge_summaries,
+    replay_fixed_bid,
+    replay_roi_pacing,
+    replay_shared_auction,
+)
+from rtb_engine.score_cache import FEATURE_COLUMNS, cached_scores, get_scores, predict_scores
+from rtb_engine.targeting_index import DEVICE_CODES, select_rows, targeted_rows
+
+
+class SimulationCancelled(Exception):
+    """Raised when a simulation is stopped through its cancel event."""
 
 
 def run_campaign_simulation(
@@ -11,192 +30,318 @@ def run_campaign_simulation(
     conversion_weight=5,
     device_targeting="all",
     active_hours=None,
-    dataset_path=None
+    dataset_path=None,
+    chunk_size=None,
+    progress=None,
+    cancel=None
 ):
     """
     Unified campaign simulation that returns metrics and analytics.
     Works for both CSV and Excel uploaded datasets.
+
+    Targeting is resolved once to row ids through the dataset's
+    TargetingIndex, and only those rows are replayed. Only the replayed
+    columns are read (memory maps of a column store when there is one),
+    and the targeted rows are gathered from them once, when replayed.
+
+    With chunk_size set, the dataset is streamed in chunks of that many
+    rows instead, so memory stays bounded by the chunk size: each chunk
+    is filtered by the targeting and replays its matching rows (scored
+    as they stream unless the log's scores are cached), budget and
+    analytics carry over between chunks, and reading stops as soon as
+    the budget is exhausted.
+    Results are identical to a full in-memory run.
+
+    progress(rows_processed, total_spent) is called after every chunk.
+    cancel is any object with is_set() (e.g. a threading.Event); it is
+    checked before every chunk and raises SimulationCancelled once set.
     """
 
     csv_path = dataset_path if dataset_path else "data/train.csv"
-    df = load_dataset(csv_path)
 
-    # Apply device filter
-    if device_targeting != "all":
-        device_map = {"mobile": 1, "desktop": 2}
-        df = df[df["device_type"] == device_map[device_targeting]]
+    if chunk_size:
+        # Cached predictions are sliced per chunk; without them each chunk's
+        # targeted rows are scored as they stream, so a run that stops early
+        # never scores the rest of the log
+        scores = cached_scores(csv_path) if strategy == "optimized" else None
+        columns = REPLAY_COLUMNS
+        if strategy == "optimized" and scores is None:
+            columns = REPLAY_COLUMNS + [name for name in FEATURE_COLUMNS if name not in REPLAY_COLUMNS]
+
+        chunks = (
+            DatasetView.from_frame(df, columns)
+            for df in iter_dataset_chunks(csv_path, chunk_size, columns=columns)
+        )
+        selected = None
+    else:
+        chunks = [DatasetView(load_columns(csv_path, REPLAY_COLUMNS))]
 
-    # Apply hour filter
-    if active_hours:
-        df = df[df["hour"].isin(active_hours)]
+        # Ascending ids of the targeted rows (None: every row), looked up
+        # in the dataset's inverted index instead of scanning the log
+        selected = select_rows(csv_path, device_targeting, active_hours)
 
-    if df.empty:
-        return _empty_results(initial_budget)
+        # Precomputed predictions for every row; targeting selects from them
+        scores = get_scores(csv_path) if strategy == "optimized" else None
 
     budget_manager = BudgetManager(initial_budget)
+    summary = None
+    total_spent = 0
+    rows_processed = 0
 
-    if strategy == "optimized":
-        return _run_optimized(df, budget_manager, base_bid, conversion_weight)
-    else:
-        return _run_baseline(df, budget_manager, base_bid, conversion_weight)
+    for view in chunks:
+        if cancel is not None and cancel.is_set():
+            raise SimulationCancelled(f"Cancelled after {rows_processed} rows")
 
+        start = rows_processed
+        rows_processed += len(view)
 
-# ========================= OPTIMIZED STRATEGY =========================
+        if scores is not None:
+            view = view.with_columns(
+                ctr=scores[0][start:rows_processed], cvr=scores[1][start:rows_processed]
+            )
 
-def _run_optimized(df, budget_manager, base_bid, conversion_weight):
+        if chunk_size:
+            view = view.select(targeted_rows(
+                view.column("device_type"), view.column("hour"), device_targeting, active_hours
+            ))
+        elif selected is not None:
+            view = view.select(selected)
 
-    predictor = Predictor()
+        if len(view) == 0:
+            if progress is not None:
+                progress(rows_processed, total_spent)
+            continue
 
-    feature_columns = [
-        "campaign_id",
-        "hour",
-        "device_type",
-        "floor_price",
-        "market_price"
-    ]
+        if strategy == "optimized" and scores is None:
+            view = _score_rows(view)
 
-    X = df[feature_columns]
+        if strategy == "optimized":
+            chunk_summary, total_spent = _run_optimized(
+                view, budget_manager, base_bid, conversion_weight, total_spent
+            )
+        else:
+            chunk_summary, total_spent = _run_baseline(
+                view, budget_manager, base_bid, conversion_weight, total_spent
+            )
 
-    ctr_probs = predictor.ctr_model.predict_proba(X)[:, 1]
-    cvr_probs = predictor.cvr_model.predict_proba(X)[:, 1]
+        summary = chunk_summary if summary is None else merge_summaries(summary, chunk_summary)
 
-    total_clicks = 0
-    total_conversions = 0
-    total_impressions = 0
-    total_spent = 0
+        if progress is not None:
+            progress(rows_processed, total_spent)
 
-    hourly_stats = {}
-    device_stats = {
-        "mobile": {"clicks": 0, "conversions": 0, "impressions": 0},
-        "desktop": {"clicks": 0, "conversions": 0, "impressions": 0}
-    }
+        if budget_manager.remaining_budget <= 0:
+            break
 
-    for i in range(len(df)):
+    if summary is None:
+        return _empty_results(initial_budget)
 
-        market_price = df.iloc[i]["market_price"]
-        value = ctr_probs[i] + conversion_weight * cvr_probs[i]
+    return _format_replay(summary, total_spent, budget_manager, conversion_weight)
 
-        # ROI-based scaling
-        roi_factor = value / (market_price + 1e-6)
-        scaled_value = roi_factor * 1000
-        budget_factor = budget_manager.get_budget_factor()
-        bid = scaled_value * budget_factor
 
-        # Safety: ensure at least slight competitive bidding
-        bid = max(bid, market_price * 1.05)
-        bid = min(bid, market_price * 1.5)
+# ========================= PARAMETER SWEEPS =========================
 
-        if bid >= market_price and budget_manager.can_bid(market_price):
+SWEEP_PARAMETERS = ["total_budget", "base_bid", "conversion_weight", "strategy"]
+SWEEP_METRICS = [
+    "total_impressions",
+    "total_clicks",
+    "total_conversions",
+    "total_spent",
+    "remaining_budget",
+    "ctr",
+    "cvr",
+    "score",
+    "avg_cpc"
+]
 
-            budget_manager.deduct(market_price)
 
-            total_impressions += 1
-            total_spent += market_price
+def build_sweep_grid(total_budgets, base_bids, conversion_weights, strategies):
+    """Cartesian product of the swept values as a list of configurations."""
+    return [
+        dict(zip(SWEEP_PARAMETERS, values))
+        for values in itertools.product(total_budgets, base_bids, conversion_weights, strategies)
+    ]
 
-            hour = int(df.iloc[i]["hour"])
-            device = "mobile" if df.iloc[i]["device_type"] == 1 else "desktop"
 
-            if hour not in hourly_stats:
-                hourly_stats[hour] = {
-                    "clicks": 0,
-                    "conversions": 0,
-                    "impressions": 0
-                }
+def run_parameter_sweep(
+    configurations,
+    device_targeting="all",
+    active_hours=None,
+    dataset_path=None,
+    workers=None
+):
+    """
+    Evaluate many (total_budget, base_bid, conversion_weight, strategy)
+    configurations against one dataset and targeting.
 
-            hourly_stats[hour]["impressions"] += 1
-            device_stats[device]["impressions"] += 1
+    The dataset is loaded, filtered and scored once; every configuration
+    replays the same arrays, optionally on a thread pool (the compiled
+    kernel releases the GIL). Returns a compact table: column names plus
+    one row of parameters and metrics per configuration, in input order.
+    """
 
-            if df.iloc[i]["click"] == 1:
-                total_clicks += 1
-                hourly_stats[hour]["clicks"] += 1
-                device_stats[device]["clicks"] += 1
+    csv_path = dataset_path if dataset_path else "data/train.csv"
+    view = DatasetView(load_columns(csv_path, REPLAY_COLUMNS)).select(
+        select_rows(csv_path, device_targeting, active_hours)
+    )
 
-            if df.iloc[i]["conversion"] == 1:
-                total_conversions += 1
-                hourly_stats[hour]["conversions"] += 1
-                device_stats[device]["conversions"] += 1
+    columns = ReplayColumns.from_view(view)
+    columns.hour_codes()
+    empty = len(columns) == 0
+
+    ctr_probs = cvr_probs = None
+    if not empty and any(c["strategy"] == "optimized" for c in configurations):
+        ctr_probs, cvr_probs = get_scores(csv_path)
+        scored = view.with_columns(ctr=ctr_probs, cvr=cvr_probs)
+        ctr_probs, cvr_probs = scored.column("ctr"), scored.column("cvr")
+
+    def evaluate(config):
+        if empty:
+            metrics = _empty_results(config["total_budget"])["metrics"]
+        else:
+            budget_manager = BudgetManager(config["total_budget"])
+
+            if config["strategy"] == "optimized":
+                summary, total_spent = replay_roi_pacing(
+                    columns, ctr_probs, cvr_probs, config["conversion_weight"], budget_manager
+                )
+            else:
+                summary, total_spent = replay_fixed_bid(columns, budget_manager, config["base_bid"])
+
+            metrics = _format_replay(
+                summary, total_spent, budget_manager, config["conversion_weight"]
+            )["metrics"]
+
+        return [config[name] for name in SWEEP_PARAMETERS] + [
+            float(metrics[name]) if isinstance(metrics[name], float) else metrics[name]
+            for name in SWEEP_METRICS
+        ]
+
+    if workers and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(evaluate, configurations))
+    else:
+        rows = [evaluate(config) for config in configurations]
 
-        if budget_manager.remaining_budget <= 0:
-            break
+    return {
+        "columns": SWEEP_PARAMETERS + SWEEP_METRICS,
+        "rows": rows
+    }
 
-    return _format_results(
-        total_impressions,
-        total_clicks,
-        total_conversions,
-        total_spent,
-        budget_manager.remaining_budget,
-        conversion_weight,
-        hourly_stats,
-        device_stats
-    )
 
+# ========================= SHARED AUCTION =========================
 
-# ========================= BASELINE STRATEGY =========================
+def run_shared_auction(campaigns, dataset_path=None):
+    """
+    Replay several campaigns against each other over one impression log.
+
+    campaigns is a list of dicts with id, total_budget, base_bid,
+    strategy, conversion_weight, device_targeting and active_hours. The
+    log is read and scored once; at every impression the campaigns whose
+    targeting matches bid (each with its own strategy and budget pacing),
+    the highest bid at or above the market price wins and pays the larger
+    of the market price and the runner-up's bid. A campaign alone gets the
+    same results as run_campaign_simulation.
+
+    Returns per-campaign results (same shape as run_campaign_simulation)
+    keyed by id, plus auction-wide counts.
+    """
 
-def _run_baseline(df, budget_manager, base_bid, conversion_weight):
+    csv_path = dataset_path if dataset_path else "data/train.csv"
+    view = DatasetView(load_columns(csv_path, REPLAY_COLUMNS))
 
-    total_clicks = 0
-    total_conversions = 0
-    total_impressions = 0
-    total_spent = 0
+    columns = ReplayColumns.from_view(view)
+    labels, _ = columns.hour_codes()
+    bidders = AuctionBidders(campaigns, labels)
+
+    ctr_probs = cvr_probs = None
+    if len(view) and bidders.optimized.any():
+        ctr_probs, cvr_probs = get_scores(csv_path)
+
+    device_type = view.column("device_type")
+    summaries, remaining, spent, stats = replay_shared_auction(
+        columns, device_type, ctr_probs, cvr_probs, bidders
+    )
 
-    hourly_stats = {}
-    device_stats = {
-        "mobile": {"clicks": 0, "conversions": 0, "impressions": 0},
-        "desktop": {"clicks": 0, "conversions": 0, "impressions": 0}
+    # Rows per (device code, hour slot), to spot campaigns whose targeting
+    # matches nothing (run_campaign_simulation reports those as empty)
+    _, codes = columns.hour_codes()
+    mobile, desktop = DEVICE_CODES["mobile"], DEVICE_CODES["desktop"]
+    device_codes = np.select([device_type == mobile, device_type == desktop], [mobile, desktop], 0)
+    row_counts = np.bincount(
+        device_codes * len(labels) + codes, minlength=3 * len(labels)
+    ).reshape(3, len(labels))
+
+    results = {}
+    for c, campaign in enumerate(campaigns):
+        target = bidders.device_target[c]
+        targeted = row_counts.sum(axis=0) if target == 0 else row_counts[target]
+        if not targeted[bidders.hour_allowed[c]].any():
+            results[campaign["id"]] = _empty_results(campaign["total_budget"])
+            continue
+
+        summary = summaries[c]
+        results[campaign["id"]] = _format_results(
+            summary["impressions"],
+            summary["clicks"],
+            summary["conversions"],
+            float(spent[c]),
+            float(remaining[c]),
+            campaign["conversion_weight"],
+            summary["hourly_stats"],
+            summary["device_stats"]
+        )
+
+    return {
+        "campaigns": results,
+        "auction": {"rows": len(view), **stats}
     }
 
-    for i in range(len(df)):
 
-        market_price = df.iloc[i]["market_price"]
+# ========================= OPTIMIZED STRATEGY =========================
 
-        if base_bid >= market_price and budget_manager.can_bid(market_price):
+def _score_rows(view):
+    """The selected rows of a streamed chunk, with ctr / cvr predicted for them."""
 
-            budget_manager.deduct(market_price)
+    rows = DatasetView({name: view.column(name) for name in view.columns})
+    ctr, cvr = predict_scores(pd.DataFrame({name: rows.column(name) for name in FEATURE_COLUMNS}))
+    return rows.with_columns(ctr=ctr, cvr=cvr)
 
-            total_impressions += 1
-            total_spent += market_price
 
-            hour = int(df.iloc[i]["hour"])
-            device = "mobile" if df.iloc[i]["device_type"] == 1 else "desktop"
+def _run_optimized(view, budget_manager, base_bid, conversion_weight, total_spent=0):
+    """view carries the rows' ctr / cvr predictions as columns."""
 
-            if hour not in hourly_stats:
-                hourly_stats[hour] = {
-                    "clicks": 0,
-                    "conversions": 0,
-                    "impressions": 0
-                }
+    columns = ReplayColumns.from_view(view)
 
-            hourly_stats[hour]["impressions"] += 1
-            device_stats[device]["impressions"] += 1
+    return replay_roi_pacing(
+        columns, view.column("ctr"), view.column("cvr"), conversion_weight, budget_manager,
+        total_spent=total_spent
+    )
 
-            if df.iloc[i]["click"] == 1:
-                total_clicks += 1
-                hourly_stats[hour]["clicks"] += 1
-                device_stats[device]["clicks"] += 1
 
-            if df.iloc[i]["conversion"] == 1:
-                total_conversions += 1
-                hourly_stats[hour]["conversions"] += 1
-                device_stats[device]["conversions"] += 1
+# ========================= BASELINE STRATEGY =========================
 
-        if budget_manager.remaining_budget <= 0:
-            break
+def _run_baseline(view, budget_manager, base_bid, conversion_weight, total_spent=0):
 
+    columns = ReplayColumns.from_view(view)
+
+    return replay_fixed_bid(columns, budget_manager, base_bid, total_spent=total_spent)
+
+
+# ========================= RESULT FORMATTER =========================
+
+def _format_replay(summary, total_spent, budget_manager, conversion_weight):
     return _format_results(
-        total_impressions,
-        total_clicks,
-        total_conversions,
+        summary["impressions"],
+        summary["clicks"],
+        summary["conversions"],
         total_spent,
         budget_manager.remaining_budget,
         conversion_weight,
-        hourly_stats,
-        device_stats
+        summary["hourly_stats"],
+        summary["device_stats"]
     )
 
 
-# ========================= RESULT FORMATTER =========================
-
 def _format_results(
     total_impressions,
     total_clicks,
@@ -0,0 +1,181 @@
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+
+# A column store is a directory next to the source file
+# (data/campaigns/<id>.csv -> data/campaigns/<id>.cols) holding one .npy
+# file per numeric column plus meta.json mapping column names to files.
+STORE_SUFFIX = ".cols"
+META_FILE = "meta.json"
+
+# Compact on-disk dtypes for the columns the engine reads. Integer columns
+# are only narrowed when every value is integral and fits the target type.
+ENGINE_DTYPES = {
+    "campaign_id": np.uint16,
+    "hour": np.uint8,
+    "device_type": np.uint8,
+    "floor_price": np.float32,
+    "market_price": np.float32,
+    "click": np.uint8,
+    "conversion": np.uint8,
+}
+
+
+def store_path_for(path):
+    """Column store directory used for a source dataset file."""
+    return os.path.splitext(path)[0] + STORE_SUFFIX
+
+
+def write_column_store(df, store_dir, source_path=None, compact=True):
+    """
+    Persist the numeric columns of a normalized frame as .npy files.
+    Non-numeric columns are not used by the engine and are skipped.
+    With compact=True the engine columns are stored with ENGINE_DTYPES
+    (prices as float32, i.e. about 7 significant digits).
+
+    The store is written to a temporary directory and renamed into place
+    (see replace_store), so readers never see a half-written store.
+    """
+
+    tmp_dir = f"{store_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    skipped = []
+
+    for col in df.columns:
+        values = df[col].to_numpy()
+        if not (np.issubdtype(values.dtype, np.number) or values.dtype == np.bool_):
+            skipped.append(str(col))
+            continue
+
+        if compact:
+            values = _compact(str(col), values)
+
+        file_name = f"col_{len(columns):03d}.npy"
+        np.save(os.path.join(tmp_dir, file_name), np.ascontiguousarray(values))
+        columns.append({"name": str(col), "file": file_name, "dtype": values.dtype.str})
+
+    meta = {
+        "rows": int(len(df)),
+        "columns": columns,
+        "skipped_columns": skipped,
+        "source": None
+    }
+
+    if source_path is not None:
+        stat = os.stat(source_path)
+        meta["source"] = {
+            "path": os.path.basename(source_path),
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size
+        }
+
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+
+    replace_store(tmp_dir, store_dir)
+
+    return store_dir
+
+
+def replace_store(tmp_dir, store_dir):
+    """
+    Move a finished store into place. The old store is renamed aside
+    first and deleted only after the new one is in place, so store_dir is
+    missing for no longer than between two renames.
+    """
+
+    old_dir = f"{store_dir}.old-{os.getpid()}"
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+    try:
+        os.rename(store_dir, old_dir)
+    except FileNotFoundError:
+        old_dir = None
+
+    os.replace(tmp_dir, store_dir)
+
+    if old_dir is not None:
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def _compact(name, values):
+    dtype = ENGINE_DTYPES.get(name)
+    if dtype is None or len(values) == 0:
+        return values
+
+    dtype = np.dtype(dtype)
+
+    if dtype.kind == "u":
+        info = np.iinfo(dtype)
+        if values.min() < 0 or values.max() > info.max:
+            return values
+        if values.dtype.kind == "f" and not np.array_equal(values, np.floor(values)):
+            return values
+        return values.astype(dtype)
+
+    compacted = values.astype(dtype)
+    if np.isinf(compacted).sum() != np.isinf(values).sum():
+        return values
+    return compacted
+
+
+def read_store_meta(store_dir):
+    with open(os.path.join(store_dir, META_FILE)) as f:
+        return json.load(f)
+
+
+def read_columns(store_dir, names=None, mmap=True):
+    """
+    Column name -> array for a column store. With mmap=True the arrays are
+    read-only memory maps, so every process reading the same store shares
+    the OS page cache and nothing is copied until it is used.
+    """
+
+    for attempt in range(2):
+        meta = read_store_meta(store_dir)
+
+        # Zero-length files cannot be memory mapped
+        mmap_mode = "r" if mmap and meta["rows"] > 0 else None
+
+        try:
+            return {
+                col["name"]: np.load(os.path.join(store_dir, col["file"]), mmap_mode=mmap_mode)
+                for col in meta["columns"]
+                if names is None or col["name"] in names
+            }
+        except FileNotFoundError:
+            # The store was replaced between reading meta and its files
+            if attempt:
+                raise
+
+
+def read_column_store(store_dir, mmap=True):
+    """
+    Load a column store as a DataFrame. Memory-mapped columns are wrapped
+    without copying, so the frame is read-only and backed by the files.
+    """
+
+    return pd.DataFrame(read_columns(store_dir, mmap=mmap), copy=False)
+
+
+def is_store_fresh(store_dir, source_path):
+    """True if store_dir exists and was built from the current source file."""
+
+    try:
+        meta = read_store_meta(store_dir)
+    except (OSError, ValueError):
+        return False
+
+    source = meta.get("source")
+    if not source:
+        return False
+
+    stat = os.stat(source_path)
+    return source["mtime_ns"] == stat.st_mtime_ns and source["size"] == stat.st_size
@@ -1,6 +1,60 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 
+# Run as a script (python backend/rtb_engine/dataset_generator.py)
+if not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rtb_engine.column_store import ENGINE_DTYPES, META_FILE, STORE_SUFFIX, replace_store
+
+
+COLUMNS = [
+    "impression_id",
+    "campaign_id",
+    "hour",
+    "device_type",
+    "floor_price",
+    "market_price",
+    "click",
+    "conversion"
+]
+
+# Shape of the generated traffic; generate_chunked_dataset takes overrides
+DEFAULT_PROFILE = {
+    # Campaign ids are 1..campaigns, drawn uniformly unless campaign_weights
+    # (one weight per campaign) is set
+    "campaigns": 5,
+    "campaign_weights": None,
+    # Campaigns with a higher click rate
+    "boosted_campaigns": [2, 3],
+    # 24 relative weights, None for uniform hours
+    "hour_weights": None,
+    # device_type code -> share of impressions (0 = desktop, 1 = mobile)
+    "device_weights": {0: 0.5, 1: 0.5},
+    # "uniform": floor ~ U(floor_range), market = floor + U(markup_range)
+    # "lognormal": floor ~ LogNormal(floor_mu, floor_sigma),
+    #              market = floor + LogNormal(markup_mu, markup_sigma)
+    "price_model": "uniform",
+    "floor_range": [1, 5],
+    "markup_range": [0.5, 3],
+    "floor_mu": 1.0,
+    "floor_sigma": 0.4,
+    "markup_mu": 0.3,
+    "markup_sigma": 0.6
+}
+
+# Rows generated per task by generate_chunked_dataset
+CHUNK_ROWS = 1_000_000
+
+
 def generate_dataset(n_rows=50000, save_path="../data/train.csv"):
     np.random.seed(42)
 
@@ -44,5 +98,276 @@ def generate_dataset(n_rows=50000, save_path="../data/train.csv"):
     df.to_csv(save_path, index=False)
     print("Dataset generated successfully.")
 
+
+# ========================= CHUNKED GENERATION =========================
+
+def generate_chunk(start, rows, seed=42, profile=None):
+    """
+    Columns of rows start .. start + rows - 1 as a dict of arrays, with the
+    same click / conversion model as generate_dataset. The random stream
+    is seeded from (seed, start) alone, so a chunk comes out the same no
+    matter which process generates it or in what order.
+    """
+
+    profile = {**DEFAULT_PROFILE, **(profile or {})}
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(start,)))
+
+    campaigns = np.arange(1, profile["campaigns"] + 1)
+    campaign_id = rng.choice(campaigns, rows, p=_probabilities(profile["campaign_weights"], len(campaigns)))
+    hour = rng.choice(24, rows, p=_probabilities(profile["hour_weights"], 24))
+
+    devices = profile["device_weights"]
+    device_type = rng.choice(
+        np.array([int(code) for code in devices]), rows, p=_probabilities(list(devices.values()), len(devices))
+    )
+
+    if profile["price_model"] == "uniform":
+        floor_price = rng.uniform(*profile["floor_range"], rows)
+        market_price = floor_price + rng.uniform(*profile["markup_range"], rows)
+    elif profile["price_model"] == "lognormal":
+        floor_price = rng.lognormal(profile["floor_mu"], profile["floor_sigma"], rows)
+        market_price = floor_price + rng.lognormal(profile["markup_mu"], profile["markup_sigma"], rows)
+    else:
+        raise ValueError(f"Unknown price model: {profile['price_model']}")
+
+    evening_boost = np.where((hour >= 18) & (hour <= 22), 0.03, 0)
+    campaign_boost = np.where(np.isin(campaign_id, profile["boosted_campaigns"]), 0.02, 0)
+    click = rng.binomial(1, np.clip(0.02 + evening_boost + campaign_boost, 0, 1))
+
+    mobile_boost = np.where(device_type == 1, 0.02, 0)
+    conversion = rng.binomial(1, np.clip(0.01 + mobile_boost + click * 0.05, 0, 1))
+
+    return {
+        "impression_id": np.arange(start, start + rows),
+        "campaign_id": campaign_id,
+        "hour": hour,
+        "device_type": device_type,
+        "floor_price": floor_price,
+        "market_price": market_price,
+        "click": click,
+        "conversion": conversion
+    }
+
+
+def _probabilities(weights, count):
+    if weights is None:
+        return None
+    if len(weights) != count:
+        raise ValueError(f"Expected {count} weights, got {len(weights)}")
+
+    weights = np.asarray(weights, dtype=np.float64)
+    return weights / weights.sum()
+
+
+def _csv_chunk(start, rows, seed, profile):
+    return pd.DataFrame(generate_chunk(start, rows, seed, profile)).to_csv(index=False, header=False)
+
+
+def _store_chunk(store_dir, start, rows, seed, profile):
+    # Each worker writes its rows straight into the preallocated files
+    columns = generate_chunk(start, rows, seed, profile)
+    for i, name in enumerate(COLUMNS):
+        target = np.load(os.path.join(store_dir, f"col_{i:03d}.npy"), mmap_mode="r+")
+        target[start:start + rows] = columns[name]
+        target.flush()
+    return rows
+
+
+def generate_chunked_dataset(
+    n_rows,
+    save_path,
+    seed=42,
+    profile=None,
+    chunk_rows=CHUNK_ROWS,
+    workers=None,
+    append=False
+):
+    """
+    Generate n_rows in independent chunks of chunk_rows on a process pool,
+    without holding more than a few chunks in memory.
+
+    A save_path ending in .cols is written as a column store (the format
+    ingest_dataset produces, with its compact dtypes); anything else is
+    written as CSV, chunk after chunk in row order. With append=True an
+    existing CSV is extended: ids continue after its last row and no
+    header is written.
+
+    Every chunk is seeded from seed and its first row, so the output only
+    depends on seed, profile and chunk_rows, never on workers. profile
+    overrides DEFAULT_PROFILE.
+    """
+
+    if profile:
+        unknown = set(profile) - set(DEFAULT_PROFILE)
+        if unknown:
+            raise ValueError(f"Unknown profile settings: {sorted(unknown)}")
+
+    workers = workers or os.cpu_count() or 1
+    chunk_rows = max(int(chunk_rows), 1)
+
+    if save_path.endswith(STORE_SUFFIX):
+        if append:
+            raise ValueError("Only CSV datasets can be appended to")
+        _generate_store(n_rows, save_path, seed, profile, chunk_rows, workers)
+    else:
+        _generate_csv(n_rows, save_path, seed, profile, chunk_rows, workers, append)
+
+    print(f"Dataset generated successfully ({n_rows} rows, {workers} workers).")
+    return save_path
+
+
+def _run_chunks(function, args, starts, chunk_rows, n_rows, workers):
+    """
+    Yield function(*args, start, rows, ...) for every chunk, in order. At
+    most two chunks per worker are in flight, which bounds memory for
+    results that are waiting for an earlier chunk.
+    """
+
+    tasks = ((start, min(chunk_rows, n_rows - start)) for start in starts)
+
+    if workers == 1:
+        for start, rows in tasks:
+            yield function(*args(start, rows))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start, rows in tasks:
+            pending.append(pool.submit(function, *args(start, rows)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _generate_csv(n_rows, save_path, seed, profile, chunk_rows, workers, append):
+    first_row = 0
+    if append and os.path.exists(save_path):
+        first_row = _count_csv_rows(save_path)
+    else:
+        append = False
+
+    directory = os.path.dirname(save_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(save_path, "a" if append else "w", newline="") as f:
+        if not append:
+            f.write(",".join(COLUMNS) + "\n")
+
+        end = first_row + n_rows
+        for text in _run_chunks(
+            _csv_chunk,
+            lambda start, rows: (start, rows, seed, profile),
+            range(first_row, end, chunk_rows),
+            chunk_rows,
+            end,
+            workers
+        ):
+            f.write(text)
+
+
+def _count_csv_rows(path):
+    """Data rows in a CSV (lines after the header)."""
+
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while block := f.read(1 << 24):
+            lines += block.count(b"\n")
+            last = block[-1:]
+
+    # A final line without a newline still counts
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def _generate_store(n_rows, store_dir, seed, profile, chunk_rows, workers):
+    tmp_dir = f"{store_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # Dtypes of the generated columns once compacted, as ingest_dataset
+    # would store them
+    dtypes = {name: np.dtype(ENGINE_DTYPES.get(name, np.int64)) for name in COLUMNS}
+    campaigns = (profile or {}).get("campaigns", DEFAULT_PROFILE["campaigns"])
+    if campaigns > np.iinfo(dtypes["campaign_id"]).max:
+        dtypes["campaign_id"] = np.dtype(np.int64)
+
+    columns = []
+    for i, name in enumerate(COLUMNS):
+        file_name = f"col_{i:03d}.npy"
+        path = os.path.join(tmp_dir, file_name)
+
+        # Zero-length files cannot be memory mapped
+        if n_rows:
+            np.lib.format.open_memmap(path, mode="w+", dtype=dtypes[name], shape=(n_rows,)).flush()
+        else:
+            np.save(path, np.empty(0, dtype=dtypes[name]))
+
+        columns.append({"name": name, "file": file_name, "dtype": dtypes[name].str})
+
+    for _ in _run_chunks(
+        _store_chunk,
+        lambda start, rows: (tmp_dir, start, rows, seed, profile),
+        range(0, n_rows, chunk_rows),
+        chunk_rows,
+        n_rows,
+        workers
+    ):
+        pass
+
+    meta = {
+        "rows": int(n_rows),
+        "columns": columns,
+        "skipped_columns": [],
+        "source": None
+    }
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta, f)
+
+    replace_store(tmp_dir, store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic impression log.")
+    parser.add_argument("--rows", type=int, default=None, help="rows to generate (chunked mode)")
+    parser.add_argument("--out", default="../data/train.csv", help=".csv or .cols (column store)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--append", action="store_true", help="extend an existing CSV")
+    parser.add_argument("--profile", default=None, help="JSON file or string overriding DEFAULT_PROFILE")
+    args = parser.parse_args()
+
+    # Without --rows the original 50k-row training set is written
+    if args.rows is None:
+        generate_dataset(save_path=args.out)
+        return
+
+    profile = None
+    if args.profile:
+        if os.path.exists(args.profile):
+            with open(args.profile) as f:
+                profile = json.load(f)
+        else:
+            profile = json.loads(args.profile)
+
+        # JSON object keys are strings
+        if "device_weights" in profile:
+            profile["device_weights"] = {int(k): v for k, v in profile["device_weights"].items()}
+
+    generate_chunked_dataset(
+        args.rows,
+        args.out,
+        seed=args.seed,
+        profile=profile,
+        chunk_rows=args.chunk_rows,
+        workers=args.workers,
+        append=args.append
+    )
+
+
 if __name__ == "__main__":
-    generate_dataset()
+    main()
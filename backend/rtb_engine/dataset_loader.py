@@ -1,16 +1,353 @@
 import pandas as pd
+import hashlib
+import io
 import os
+import shutil
+import threading
+from collections import OrderedDict
 
+from rtb_engine.column_store import (
+    META_FILE,
+    STORE_SUFFIX,
+    is_store_fresh,
+    read_column_store,
+    read_columns,
+    read_store_meta,
+    store_path_for,
+    write_column_store,
+)
 
-def load_dataset(path="data/train.csv"):
+
+# Cached frames are handed out as shallow copies. Copy-on-write (always
+# on from pandas 3) makes a caller's in-place edit copy the columns it
+# touches instead of changing the cached frame
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Memory budget for cached datasets (in-memory size of the normalized frames)
+DATASET_CACHE_BYTES = int(os.environ.get("BIDWISE_DATASET_CACHE_MB", "512")) * 1024 * 1024
+
+# abs path -> (mtime_ns, size, nbytes, frame), least recently used first
+_cache = OrderedDict()
+_cache_bytes = 0
+_cache_lock = threading.Lock()
+
+# abs path -> (mtime_ns, size, content digest)
+_fingerprints = {}
+
+
+def load_dataset(path="data/train.csv", use_cache=True):
     """
     Safe global dataset loader that supports both CSV and Excel formats.
     Normalizes columns and ensures correct data types.
+
+    If the file has been ingested (see ingest_dataset) and the binary
+    column store is still up to date, it is read instead of re-parsing
+    the source. A column store directory can also be passed directly.
+
+    Normalized frames are kept in an LRU cache keyed by path, mtime and
+    size, so repeated loads of an unchanged file do no disk I/O or parsing.
+    Callers get shallow copies of the cached frame; copy-on-write keeps
+    their in-place edits from reaching the cache or other callers.
     """
 
     if not os.path.exists(path):
         raise FileNotFoundError(f"Dataset file not found: {path}")
 
+    if not use_cache:
+        return _read_dataset(path)
+
+    key = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[:2] == version:
+            _cache.move_to_end(key)
+            return entry[3].copy(deep=False)
+
+    df = _read_dataset(path)
+    nbytes = int(df.memory_usage(deep=True).sum())
+
+    if nbytes <= DATASET_CACHE_BYTES:
+        _cache_put(key, (*version, nbytes, df))
+
+    return df.copy(deep=False)
+
+
+def _cache_put(key, entry):
+    global _cache_bytes
+
+    with _cache_lock:
+        previous = _cache.pop(key, None)
+        if previous is not None:
+            _cache_bytes -= previous[2]
+
+        _cache[key] = entry
+        _cache_bytes += entry[2]
+
+        while _cache_bytes > DATASET_CACHE_BYTES:
+            _, evicted = _cache.popitem(last=False)
+            _cache_bytes -= evicted[2]
+
+
+def clear_dataset_cache():
+    """Drop every cached dataset."""
+    global _cache_bytes
+
+    with _cache_lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def remove_dataset(path):
+    """Delete a dataset file with its column store and forget it in the caches."""
+    global _cache_bytes
+
+    key = os.path.abspath(path)
+    with _cache_lock:
+        entry = _cache.pop(key, None)
+        if entry is not None:
+            _cache_bytes -= entry[2]
+    _fingerprints.pop(key, None)
+
+    shutil.rmtree(store_path_for(path), ignore_errors=True)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def dataset_cache_info():
+    """Cached paths and memory usage, for diagnostics."""
+
+    with _cache_lock:
+        return {
+            "entries": len(_cache),
+            "bytes": _cache_bytes,
+            "max_bytes": DATASET_CACHE_BYTES,
+            "paths": list(_cache.keys())
+        }
+
+
+def store_to_read(path):
+    """
+    The column store reads of path come from: path itself if it is a
+    store, its store if that is up to date with the file, else None
+    (the file is parsed). Stores hold float32 prices, files float64.
+    """
+
+    if path.endswith(STORE_SUFFIX):
+        return path
+
+    store_dir = store_path_for(path)
+    if os.path.exists(path) and is_store_fresh(store_dir, path):
+        return store_dir
+    return None
+
+
+def dataset_source(path):
+    """
+    "store" if reads of path come from a column store, else "file". The
+    two can give results differing in the last digits (float32 prices),
+    so caches of derived results keep them apart.
+    """
+    return "store" if store_to_read(path) is not None else "file"
+
+
+def load_columns(path, names):
+    """
+    Column name -> array for only the named columns of a dataset, without
+    copying: memory maps of an up-to-date column store, otherwise views
+    of the cached normalized frame. Arrays are read-only.
+    """
+
+    store_dir = store_to_read(path)
+
+    if store_dir is not None:
+        columns = read_columns(store_dir, names=names)
+        missing = [name for name in names if name not in columns]
+        if missing:
+            raise KeyError(f"Columns {missing} not in dataset {path}")
+        return {name: columns[name] for name in names}
+
+    df = load_dataset(path)
+    return {name: df[name].to_numpy() for name in names}
+
+
+def dataset_row_count(path):
+    """
+    Number of rows in a dataset if it is known without reading it (fresh
+    column store or cached frame), otherwise None.
+    """
+
+    store_dir = store_to_read(path)
+    if store_dir is not None:
+        return read_store_meta(store_dir)["rows"]
+
+    with _cache_lock:
+        entry = _cache.get(os.path.abspath(path))
+
+    return len(entry[3]) if entry is not None else None
+
+
+def _fingerprint_version(path):
+    """(files to hash, (mtime_ns, size)) of a dataset file or column store."""
+
+    if os.path.isdir(path):
+        stat = os.stat(os.path.join(path, META_FILE))
+        files = sorted(os.path.join(path, name) for name in os.listdir(path))
+    else:
+        stat = os.stat(path)
+        files = [path]
+
+    return files, (stat.st_mtime_ns, stat.st_size)
+
+
+def cached_fingerprint(path):
+    """
+    dataset_fingerprint(path) if it is already known for the file's
+    current mtime and size, else None. Only stats the file, so it is
+    cheap enough to call from the event loop.
+    """
+
+    _, version = _fingerprint_version(path)
+    entry = _fingerprints.get(os.path.abspath(path))
+    if entry is not None and entry[:2] == version:
+        return entry[2]
+    return None
+
+
+def dataset_fingerprint(path):
+    """
+    Content hash of a dataset file or column store directory, so identical
+    uploads under different paths are recognised as the same data. It is
+    memoized by path, mtime and size and only recomputed when those
+    change. Hashing reads the whole file: async callers should check
+    cached_fingerprint first and otherwise run this off the event loop.
+    """
+
+    files, version = _fingerprint_version(path)
+    key = os.path.abspath(path)
+
+    entry = _fingerprints.get(key)
+    if entry is not None and entry[:2] == version:
+        return entry[2]
+
+    digest = hashlib.sha256()
+    for file_path in files:
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+
+    fingerprint = digest.hexdigest()
+    _fingerprints[key] = (*version, fingerprint)
+    return fingerprint
+
+
+def iter_dataset_chunks(path, chunk_size, columns=None):
+    """
+    Yield the normalized dataset as consecutive frames of at most
+    chunk_size rows, without loading the whole file. Column stores are
+    sliced from their memory maps and CSVs are read with chunksize;
+    Excel cannot be streamed and is loaded once, then sliced.
+
+    With columns set, only those (normalized) columns are read or kept.
+    """
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset file not found: {path}")
+
+    store_dir = store_to_read(path)
+
+    if store_dir is not None:
+        arrays = read_columns(store_dir, names=columns)
+        rows = len(next(iter(arrays.values()))) if arrays else 0
+        for start in range(0, rows, chunk_size):
+            yield pd.DataFrame(
+                {name: values[start:start + chunk_size] for name, values in arrays.items()},
+                copy=False
+            )
+
+    elif path.endswith(".csv"):
+        usecols = None
+        if columns is not None:
+            wanted = set(columns)
+            usecols = lambda name: _normalize_name(name) in wanted
+
+        for chunk in pd.read_csv(path, chunksize=chunk_size, usecols=usecols):
+            yield _normalize(chunk)
+
+    else:
+        df = load_dataset(path)
+        if columns is not None:
+            df = df[list(columns)]
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+
+
+def ingest_dataset(path):
+    """
+    Normalize a CSV/Excel dataset once and persist it as a binary column
+    store next to the source, so later loads skip CSV/Excel parsing.
+    Returns the store directory.
+    """
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Dataset file not found: {path}")
+
+    df = _parse_dataset(path)
+    return write_column_store(df, store_path_for(path), source_path=path)
+
+
+def append_dataset_rows(path, content):
+    """
+    Append the rows of a CSV file (bytes) to the CSV dataset at path and
+    refresh its column store. Column names must match the dataset's after
+    normalization; order may differ. Returns the normalized new rows.
+    """
+
+    if not path.endswith(".csv"):
+        raise ValueError(f"Rows can only be appended to CSV datasets: {path}")
+
+    rows = _normalize(pd.read_csv(io.BytesIO(content)))
+    columns = list(_normalize(pd.read_csv(path, nrows=0)).columns)
+
+    if sorted(rows.columns) != sorted(columns):
+        raise ValueError(
+            f"Appended columns {list(rows.columns)} do not match the dataset columns {columns}"
+        )
+
+    # The new rows must start on a line of their own
+    needs_newline = False
+    with open(path, "rb") as f:
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+
+    with open(path, "a", newline="") as f:
+        if needs_newline:
+            f.write("\n")
+        rows[columns].to_csv(f, header=False, index=False)
+
+    if os.path.isdir(store_path_for(path)):
+        ingest_dataset(path)
+
+    return rows
+
+
+def _read_dataset(path):
+
+    store_dir = store_to_read(path)
+    if store_dir is not None:
+        return read_column_store(store_dir)
+
+    return _parse_dataset(path)
+
+
+def _parse_dataset(path):
+
     # Load file
     if path.endswith(".csv"):
         df = pd.read_csv(path)
@@ -21,6 +358,16 @@ def load_dataset(path="data/train.csv"):
     else:
         raise ValueError(f"Unsupported dataset format: {path}")
 
+    return _normalize(df)
+
+
+def _normalize_name(name):
+    # Same as the column normalization in _normalize
+    return str(name).strip().lower().replace(" ", "_")
+
+
+def _normalize(df):
+
     # 🔥 CRITICAL FIX: Normalize column names
     df.columns = (
         df.columns
@@ -44,4 +391,4 @@ def load_dataset(path="data/train.csv"):
         if col in df.columns:
             df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
 
-    return df
\ No newline at end of file
+    return df
@@ -0,0 +1,50 @@
+import numpy as np
+
+
+class DatasetView:
+    """
+    Lazy selection of rows over a few named columns of a dataset.
+
+    The columns are full-length arrays (memory maps or views of a cached
+    frame) and are never copied by the view itself; a row selection is
+    only recorded, and applied when a column is materialized with
+    column(). Selections compose, so narrowing a view stays free until
+    the arrays are needed.
+    """
+
+    def __init__(self, columns, rows=None):
+        self.columns = columns
+        self.rows = rows
+
+    @classmethod
+    def from_frame(cls, df, names):
+        return cls({name: df[name].to_numpy() for name in names})
+
+    def __len__(self):
+        if self.rows is not None:
+            return len(self.rows)
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def with_columns(self, **columns):
+        """View with more full-length columns (aligned with the existing ones)."""
+        return DatasetView({**self.columns, **columns}, self.rows)
+
+    def select(self, rows):
+        """View of the given positions of this view (None keeps every row)."""
+
+        if rows is None:
+            return self
+        if self.rows is not None:
+            rows = self.rows[rows]
+        return DatasetView(self.columns, rows)
+
+    def column(self, name):
+        """The selected rows of one column (a view when nothing is selected)."""
+
+        values = self.columns[name]
+        return values if self.rows is None else values[self.rows]
+
+    @property
+    def nbytes(self):
+        """Bytes column() would allocate for every column of the view."""
+        return sum(np.dtype(values.dtype).itemsize for values in self.columns.values()) * len(self)
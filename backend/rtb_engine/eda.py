@@ -25,6 +25,6 @@ def run_eda():
         "total_conversions": int(total_conversions),
         "ctr": round(ctr, 4),
         "cvr": round(cvr, 4),
-        "avg_market_price": round(avg_market_price, 2),
+        "avg_market_price": round(float(avg_market_price), 2),
         "device_distribution": device_distribution
     }
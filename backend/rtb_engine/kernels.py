@@ -0,0 +1,221 @@
+"""
+Compiled auction kernels.
+
+Numba is optional: when it is installed the kernels below are compiled to
+native code (and release the GIL), otherwise HAS_NUMBA is False and the
+replay engine keeps using its pure Python loops.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+# Columns of the hourly / device counter arrays
+IMPRESSIONS = 0
+CLICKS = 1
+CONVERSIONS = 2
+
+
+def roi_pacing_kernel(
+    ctr,
+    cvr,
+    market_price,
+    hour_codes,
+    mobile,
+    click,
+    conversion,
+    conversion_weight,
+    initial_budget,
+    remaining,
+    floor_multiplier,
+    cap_multiplier,
+    min_value,
+    total_spent,
+    hour_counts,
+    device_counts
+):
+    """
+    Budget-paced ROI bidding over float64 arrays.
+
+    Wins are accumulated into hour_counts[hour_code] and device_counts
+    (row 0 = mobile, row 1 = desktop) in place. Returns the remaining
+    budget and the total spend, continued from total_spent. The arithmetic
+    mirrors replay_roi_pacing operation for operation so both paths give
+    identical results.
+    """
+
+    for i in range(market_price.shape[0]):
+        price = market_price[i]
+        value = ctr[i] + conversion_weight * cvr[i]
+
+        roi_factor = value / (price + 1e-6)
+        bid = roi_factor * 1000 * (remaining / initial_budget)
+
+        if value > min_value:
+            floor = price * floor_multiplier
+            if floor > bid:
+                bid = floor
+        cap = price * cap_multiplier
+        if cap < bid:
+            bid = cap
+
+        if bid >= price and remaining >= price:
+            remaining -= price
+            total_spent += price
+
+            device = 0 if mobile[i] else 1
+            hour_counts[hour_codes[i], IMPRESSIONS] += 1
+            device_counts[device, IMPRESSIONS] += 1
+
+            if click[i]:
+                hour_counts[hour_codes[i], CLICKS] += 1
+                device_counts[device, CLICKS] += 1
+
+            if conversion[i]:
+                hour_counts[hour_codes[i], CONVERSIONS] += 1
+                device_counts[device, CONVERSIONS] += 1
+
+        if remaining <= 0:
+            break
+
+    return remaining, total_spent
+
+
+# Columns of the shared auction's stats array
+BID_ROWS = 0
+CONTESTED_ROWS = 1
+WON_ROWS = 2
+
+
+def shared_auction_kernel(
+    ctr,
+    cvr,
+    market_price,
+    hour_codes,
+    device_type,
+    mobile,
+    click,
+    conversion,
+    optimized,
+    conversion_weight,
+    base_bid,
+    initial_budget,
+    remaining,
+    device_target,
+    hour_allowed,
+    floor_multiplier,
+    cap_multiplier,
+    spent,
+    hour_counts,
+    device_counts,
+    stats
+):
+    """
+    One pass of second-price auctions between several campaigns and the
+    market over float64 arrays.
+
+    Per row, every active campaign whose targeting matches bids (ROI
+    pacing or its fixed bid, never more than its remaining budget); the
+    highest bid at or above the market price wins and pays the larger of
+    the market price and the runner-up's bid. remaining, spent and the
+    per-campaign hour_counts[c, hour_code] / device_counts[c] are updated
+    in place; stats counts rows with bids, contested rows and wins. A
+    single campaign gets exactly roi_pacing_kernel's / the fixed-bid
+    replay's results.
+    """
+
+    n_campaigns = remaining.shape[0]
+    active = np.ones(n_campaigns, dtype=np.bool_)
+    n_active = n_campaigns
+
+    for i in range(market_price.shape[0]):
+        price = market_price[i]
+        code = hour_codes[i]
+
+        winner = -1
+        best = 0.0
+        second = price
+        bidders = 0
+
+        for c in range(n_campaigns):
+            if not active[c]:
+                continue
+            if device_target[c] != 0 and device_type[i] != device_target[c]:
+                continue
+            if not hour_allowed[c, code]:
+                continue
+
+            if optimized[c]:
+                value = ctr[i] + conversion_weight[c] * cvr[i]
+                roi_factor = value / (price + 1e-6)
+                bid = roi_factor * 1000 * (remaining[c] / initial_budget[c])
+
+                floor = price * floor_multiplier
+                if floor > bid:
+                    bid = floor
+                cap = price * cap_multiplier
+                if cap < bid:
+                    bid = cap
+            else:
+                bid = base_bid[c]
+
+            # A campaign cannot bid more than it has left
+            if remaining[c] < bid:
+                bid = remaining[c]
+            if not bid >= price:
+                continue
+
+            bidders += 1
+            if winner < 0 or bid > best:
+                if winner >= 0 and best > second:
+                    second = best
+                winner = c
+                best = bid
+            elif bid > second:
+                second = bid
+
+        if bidders > 0:
+            stats[BID_ROWS] += 1
+            if bidders > 1:
+                stats[CONTESTED_ROWS] += 1
+
+        if winner >= 0:
+            stats[WON_ROWS] += 1
+            remaining[winner] -= second
+            spent[winner] += second
+
+            device = 0 if mobile[i] else 1
+            hour_counts[winner, code, IMPRESSIONS] += 1
+            device_counts[winner, device, IMPRESSIONS] += 1
+
+            if click[i]:
+                hour_counts[winner, code, CLICKS] += 1
+                device_counts[winner, device, CLICKS] += 1
+
+            if conversion[i]:
+                hour_counts[winner, code, CONVERSIONS] += 1
+                device_counts[winner, device, CONVERSIONS] += 1
+
+        # Exhausted campaigns stop bidding (campaigns that started
+        # without budget after the first row, like the single replay)
+        if winner >= 0 and remaining[winner] <= 0:
+            active[winner] = False
+            n_active -= 1
+        if i == 0:
+            for c in range(n_campaigns):
+                if active[c] and remaining[c] <= 0:
+                    active[c] = False
+                    n_active -= 1
+
+        if n_active == 0:
+            break
+
+
+if HAS_NUMBA:
+    roi_pacing_kernel = njit(nogil=True, cache=True)(roi_pacing_kernel)
+    shared_auction_kernel = njit(nogil=True, cache=True)(shared_auction_kernel)
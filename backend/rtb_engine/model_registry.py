@@ -0,0 +1,87 @@
+import hashlib
+import io
+import logging
+import os
+import threading
+
+import joblib
+
+
+CTR_MODEL_PATH = "models/ctr_model.pkl"
+CVR_MODEL_PATH = "models/cvr_model.pkl"
+
+logger = logging.getLogger(__name__)
+
+
+# path -> (mtime_ns, size, content digest, model)
+_models = {}
+_lock = threading.Lock()
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _entry(path):
+    """Return the cached entry for path, (re)loading it if the file changed."""
+
+    stat = _stat(path)
+    entry = _models.get(path)
+
+    if entry is None or entry[:2] != stat:
+        with _lock:
+            # Keep the stat taken before reading: if the file is rewritten
+            # while it is being loaded, the next call sees a newer stat and
+            # reloads instead of caching stale content as current
+            stat = _stat(path)
+            entry = _models.get(path)
+            if entry is None or entry[:2] != stat:
+                with open(path, "rb") as f:
+                    content = f.read()
+
+                digest = hashlib.sha256(content).hexdigest()
+                model = joblib.load(io.BytesIO(content))
+
+                entry = (*stat, digest, model)
+                _models[path] = entry
+                logger.info("Loaded %s (%s)", path, digest[:12])
+
+    return entry
+
+
+def get_model(path):
+    """
+    Shared, process-wide model instance for path. The pickle is only
+    unpickled again when its mtime or size changes on disk.
+    """
+    return _entry(path)[3]
+
+
+def get_models():
+    """(ctr_model, cvr_model) from the registry."""
+    return get_model(CTR_MODEL_PATH), get_model(CVR_MODEL_PATH)
+
+
+def model_version(paths=(CTR_MODEL_PATH, CVR_MODEL_PATH)):
+    """
+    Short id derived from the content of the model files. It changes
+    whenever train_models.py writes different pickles.
+    """
+
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(_entry(path)[2].encode())
+
+    return digest.hexdigest()[:16]
+
+
+def save_model(model, path):
+    """
+    Write a model pickle atomically so processes hot-reloading it never
+    see a partially written file.
+    """
+
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, path)
@@ -1,10 +1,15 @@
-import joblib
 import pandas as pd
+from rtb_engine import model_registry
+from rtb_engine.scorer import get_scorer
 
 class Predictor:
     def __init__(self):
-        self.ctr_model = joblib.load("models/ctr_model.pkl")
-        self.cvr_model = joblib.load("models/cvr_model.pkl")
+        self.ctr_model, self.cvr_model = model_registry.get_models()
+        self.model_version = model_registry.model_version()
+
+        # Native scorer when both models are validated logistic
+        # regressions, otherwise None and sklearn is used
+        self.scorer = get_scorer()
 
         self.feature_columns = [
             "campaign_id",
@@ -14,10 +19,40 @@ class Predictor:
             "market_price"
         ]
 
+    def _feature_values(self, features):
+        if isinstance(features, dict):
+            return [features[col] for col in self.feature_columns]
+        return features
+
+    def predict(self, features):
+        """(ctr, cvr) for one request, scoring both models at once."""
+        if self.scorer is not None:
+            return self.scorer.score(self._feature_values(features))
+
+        df = pd.DataFrame([features], columns=self.feature_columns)
+        return (
+            self.ctr_model.predict_proba(df)[0][1],
+            self.cvr_model.predict_proba(df)[0][1]
+        )
+
+    def predict_batch(self, df):
+        """(ctr, cvr) arrays for every row of a feature frame."""
+        if self.scorer is not None:
+            return self.scorer.score_batch(df)
+
+        X = df[self.feature_columns]
+        return self.ctr_model.predict_proba(X)[:, 1], self.cvr_model.predict_proba(X)[:, 1]
+
     def predict_ctr(self, features):
+        if self.scorer is not None:
+            return self.scorer.score(self._feature_values(features))[0]
+
         df = pd.DataFrame([features], columns=self.feature_columns)
         return self.ctr_model.predict_proba(df)[0][1]
 
     def predict_cvr(self, features):
+        if self.scorer is not None:
+            return self.scorer.score(self._feature_values(features))[1]
+
         df = pd.DataFrame([features], columns=self.feature_columns)
         return self.cvr_model.predict_proba(df)[0][1]
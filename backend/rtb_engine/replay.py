@@ -0,0 +1,624 @@
+import numpy as np
+
+from rtb_engine import kernels
+from rtb_engine.dataset_view import DatasetView
+from rtb_engine.targeting_index import DEVICE_CODES
+
+
+# Rows are pulled out of the NumPy columns in blocks of this size and
+# converted to Python scalars, which keeps the inner loop free of per-row
+# NumPy/pandas overhead while bounding the temporary lists on huge logs.
+BLOCK_SIZE = 65536
+
+MOBILE_DEVICE = DEVICE_CODES["mobile"]
+
+# Hours are counted in fixed-size arrays indexed by hour - min(hour);
+# wider (malformed) ranges fall back to np.unique codes.
+MAX_HOUR_SLOTS = 4096
+
+# Dataset columns the replay reads
+REPLAY_COLUMNS = ["market_price", "hour", "device_type", "click", "conversion"]
+
+
+# =========================================================
+# COLUMN SNAPSHOT
+# =========================================================
+
+class ReplayColumns:
+    """
+    Contiguous NumPy arrays of the columns the auction replay reads.
+    Built once per simulation instead of indexing the frame per row.
+
+    Columns keep their stored dtypes where the replay arithmetic allows
+    it (float32 prices, small integer hours), so a large log is not
+    widened to 64 bits on its way in.
+    """
+
+    def __init__(self, market_price, hour, device_type, click, conversion):
+        self.market_price = _price_array(market_price)
+        self.hour = np.ascontiguousarray(hour)
+        if self.hour.dtype.kind not in "iu":
+            self.hour = self.hour.astype(np.int64)
+        self.mobile = np.ascontiguousarray(device_type) == MOBILE_DEVICE
+        self.click = np.ascontiguousarray(click) == 1
+        self.conversion = np.ascontiguousarray(conversion) == 1
+        self._hour_codes = None
+
+    @classmethod
+    def from_view(cls, view):
+        """Columns of a DatasetView; only its selected rows are copied."""
+        return cls(*(view.column(name) for name in REPLAY_COLUMNS))
+
+    @classmethod
+    def from_frame(cls, df, rows=None):
+        """Columns of df, or of only the given row ids (no frame copy)."""
+        return cls.from_view(DatasetView.from_frame(df, REPLAY_COLUMNS).select(rows))
+
+    def __len__(self):
+        return len(self.market_price)
+
+    def hour_codes(self):
+        """Map each row's hour to a slot of the fixed-size hourly counters."""
+
+        if self._hour_codes is None:
+            if len(self.hour) == 0:
+                self._hour_codes = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint16))
+            else:
+                low, high = int(self.hour.min()), int(self.hour.max())
+                if high - low < MAX_HOUR_SLOTS:
+                    labels = np.arange(low, high + 1, dtype=np.int64)
+                    # Slots fit in 16 bits; subtract straight into them
+                    codes = np.subtract(
+                        self.hour, low, out=np.empty(len(self.hour), dtype=np.uint16), casting="unsafe"
+                    )
+                    self._hour_codes = (labels, codes)
+                else:
+                    labels, codes = np.unique(self.hour, return_inverse=True)
+                    self._hour_codes = (labels, codes.astype(np.int64))
+
+        return self._hour_codes
+
+    def new_counters(self):
+        """Zeroed (hour_counts, device_counts) arrays for the kernels."""
+        labels, _ = self.hour_codes()
+        return (
+            np.zeros((len(labels), 3), dtype=np.int64),
+            np.zeros((2, 3), dtype=np.int64)
+        )
+
+    def summarize(self, won):
+        """
+        Aggregate won rows into the totals and hourly/device stats
+        consumed by the result formatters.
+        """
+
+        labels, codes = self.hour_codes()
+        hour_counts, device_counts = self.new_counters()
+        n_hours = len(labels)
+
+        won_codes = codes[won]
+        clicks = self.click[won]
+        conversions = self.conversion[won]
+        mobile = self.mobile[won]
+
+        hour_counts[:, kernels.IMPRESSIONS] = np.bincount(won_codes, minlength=n_hours)
+        hour_counts[:, kernels.CLICKS] = np.bincount(won_codes, weights=clicks, minlength=n_hours)
+        hour_counts[:, kernels.CONVERSIONS] = np.bincount(won_codes, weights=conversions, minlength=n_hours)
+
+        for device, selected in enumerate((mobile, ~mobile)):
+            device_counts[device, kernels.IMPRESSIONS] = np.count_nonzero(selected)
+            device_counts[device, kernels.CLICKS] = np.count_nonzero(clicks & selected)
+            device_counts[device, kernels.CONVERSIONS] = np.count_nonzero(conversions & selected)
+
+        return summarize_counters(labels, hour_counts, device_counts)
+
+
+def _price_array(values):
+    # float32 prices are kept: the replay compares and sums them in float64
+    # (see _fixed_bid_closed_form), which widens them exactly
+    values = np.ascontiguousarray(values)
+    if values.dtype in (np.float32, np.float64):
+        return values
+    return values.astype(np.float64)
+
+
+def summarize_counters(hour_labels, hour_counts, device_counts):
+    """
+    Convert hourly/device counter arrays into the totals and stats dicts
+    consumed by the result formatters. Hours without impressions are left
+    out, as the per-row loops never created them.
+    """
+
+    def stats(row):
+        return {
+            "clicks": int(row[kernels.CLICKS]),
+            "conversions": int(row[kernels.CONVERSIONS]),
+            "impressions": int(row[kernels.IMPRESSIONS])
+        }
+
+    hourly_stats = {
+        int(hour_labels[i]): stats(hour_counts[i])
+        for i in np.flatnonzero(hour_counts[:, kernels.IMPRESSIONS])
+    }
+
+    device_stats = {
+        "mobile": stats(device_counts[0]),
+        "desktop": stats(device_counts[1])
+    }
+
+    totals = device_counts.sum(axis=0)
+
+    return {
+        "impressions": int(totals[kernels.IMPRESSIONS]),
+        "clicks": int(totals[kernels.CLICKS]),
+        "conversions": int(totals[kernels.CONVERSIONS]),
+        "hourly_stats": hourly_stats,
+        "device_stats": device_stats
+    }
+
+
+def merge_summaries(first, second):
+    """Combine two summaries, e.g. from consecutive chunks of one log."""
+
+    def add(a, b):
+        return {key: a.get(key, 0) + b.get(key, 0) for key in ("clicks", "conversions", "impressions")}
+
+    hourly_stats = dict(first["hourly_stats"])
+    for hour, stats in second["hourly_stats"].items():
+        hourly_stats[hour] = add(hourly_stats.get(hour, {}), stats)
+
+    return {
+        "impressions": first["impressions"] + second["impressions"],
+        "clicks": first["clicks"] + second["clicks"],
+        "conversions": first["conversions"] + second["conversions"],
+        "hourly_stats": hourly_stats,
+        "device_stats": {
+            device: add(first["device_stats"][device], second["device_stats"][device])
+            for device in ("mobile", "desktop")
+        }
+    }
+
+
+# =========================================================
+# AUCTION LOOPS
+# =========================================================
+#
+# The loops reproduce BudgetManager.can_bid / deduct / get_budget_factor
+# with the same floating point operations in the same order, so results
+# match the original per-row implementation exactly. They return the
+# summary of won rows (see summarize_counters) and the total spend, and
+# leave the budget manager holding the final remaining budget. Passing the
+# previous total_spent continues the spend accumulation across calls, so a
+# log replayed in consecutive chunks gives the same result as one pass.
+
+def replay_fixed_bid(columns, budget_manager, bid, vectorized=True, total_spent=0):
+    """
+    Replay the auction with a constant bid. The vectorized mode gives the
+    same result as the sequential loop without visiting rows one by one.
+    """
+
+    if vectorized and _can_vectorize_fixed_bid(columns, budget_manager):
+        won, total_spent = _fixed_bid_closed_form(columns, budget_manager, bid, total_spent)
+    else:
+        won, total_spent = _fixed_bid_loop(columns, budget_manager, bid, total_spent)
+
+    return columns.summarize(won), total_spent
+
+
+def _fixed_bid_loop(columns, budget_manager, bid, total_spent):
+    remaining = budget_manager.remaining_budget
+    won = []
+
+    for start in range(0, len(columns), BLOCK_SIZE):
+        prices = columns.market_price[start:start + BLOCK_SIZE].tolist()
+        exhausted = False
+
+        for offset, market_price in enumerate(prices):
+            if bid >= market_price and remaining >= market_price:
+                remaining -= market_price
+                total_spent += market_price
+                won.append(start + offset)
+
+            if remaining <= 0:
+                exhausted = True
+                break
+
+        if exhausted:
+            break
+
+    budget_manager.remaining_budget = remaining
+    return np.asarray(won, dtype=np.int64), total_spent
+
+
+def _can_vectorize_fixed_bid(columns, budget_manager):
+    # The closed form relies on the running budget never increasing, and
+    # an exhausted budget at the start still lets the first row through.
+    return (
+        budget_manager.remaining_budget > 0
+        and not (columns.market_price < 0).any()
+    )
+
+
+def _fixed_bid_closed_form(columns, budget_manager, bid, total_spent):
+    """
+    With a fixed bid the only candidates are rows where bid >= market price,
+    and each one is won until the budget can no longer cover it. The running
+    budget over the candidates is a subtract-accumulate (the same operations
+    as BudgetManager.deduct, in order), and the first row it cannot cover is
+    found with searchsorted. Rows after that point are only won if they are
+    no more expensive than what is left, so the search repeats on those until
+    no candidate fits.
+    """
+
+    prices = columns.market_price
+    remaining = budget_manager.remaining_budget
+
+    # Python scalars take the array's dtype (NumPy 2 promotion); as float64
+    # scalars they compare float32 prices in float64, like the loops do
+    candidates = np.flatnonzero(np.float64(bid) >= prices)
+    won_parts = []
+
+    while len(candidates) and remaining > 0:
+        ledger = np.subtract.accumulate(
+            np.concatenate(([remaining], prices[candidates]))
+        )[1:]
+
+        # First candidate that empties the budget or cannot be covered
+        stop = int(np.searchsorted(-ledger, 0, side="left"))
+
+        if stop == len(ledger):
+            won_parts.append(candidates)
+            remaining = float(ledger[-1])
+            break
+
+        if ledger[stop] == 0:
+            won_parts.append(candidates[:stop + 1])
+            remaining = 0.0
+            break
+
+        won_parts.append(candidates[:stop])
+        if stop > 0:
+            remaining = float(ledger[stop - 1])
+
+        rest = candidates[stop + 1:]
+        candidates = rest[prices[rest] <= np.float64(remaining)]
+
+    won = np.concatenate(won_parts) if won_parts else np.empty(0, dtype=np.int64)
+    if len(won):
+        total_spent = float(np.cumsum(np.concatenate(([total_spent], prices[won])))[-1])
+
+    budget_manager.remaining_budget = remaining
+    return won.astype(np.int64, copy=False), total_spent
+
+
+def replay_roi_pacing(
+    columns,
+    ctr,
+    cvr,
+    conversion_weight,
+    budget_manager,
+    floor_multiplier=1.05,
+    cap_multiplier=1.5,
+    min_value=None,
+    total_spent=0
+):
+    """
+    Replay the auction bidding on expected value (ctr + weight * cvr) per
+    unit of market price, scaled by the remaining budget fraction and
+    clamped to [floor_multiplier, cap_multiplier] x market price. When
+    min_value is set, the floor only applies to impressions whose value
+    exceeds it. Runs the compiled kernel when Numba is available.
+    """
+
+    if kernels.HAS_NUMBA:
+        return _roi_pacing_compiled(
+            columns, ctr, cvr, conversion_weight, budget_manager,
+            floor_multiplier, cap_multiplier, min_value, total_spent
+        )
+
+    values = ctr + conversion_weight * cvr
+    won, total_spent = _roi_pacing_loop(
+        columns, values, budget_manager,
+        floor_multiplier, cap_multiplier, min_value, total_spent
+    )
+
+    return columns.summarize(won), total_spent
+
+
+def _roi_pacing_compiled(
+    columns,
+    ctr,
+    cvr,
+    conversion_weight,
+    budget_manager,
+    floor_multiplier,
+    cap_multiplier,
+    min_value,
+    total_spent
+):
+    labels, codes = columns.hour_codes()
+    hour_counts, device_counts = columns.new_counters()
+
+    remaining, spent = kernels.roi_pacing_kernel(
+        np.ascontiguousarray(ctr, dtype=np.float64),
+        np.ascontiguousarray(cvr, dtype=np.float64),
+        columns.market_price,
+        codes,
+        columns.mobile,
+        columns.click,
+        columns.conversion,
+        conversion_weight,
+        float(budget_manager.initial_budget),
+        float(budget_manager.remaining_budget),
+        float(floor_multiplier),
+        float(cap_multiplier),
+        -np.inf if min_value is None else float(min_value),
+        float(total_spent),
+        hour_counts,
+        device_counts
+    )
+
+    if device_counts[:, kernels.IMPRESSIONS].any():
+        budget_manager.remaining_budget = remaining
+        total_spent = spent
+
+    return summarize_counters(labels, hour_counts, device_counts), total_spent
+
+
+def _roi_pacing_loop(
+    columns,
+    values,
+    budget_manager,
+    floor_multiplier,
+    cap_multiplier,
+    min_value,
+    total_spent
+):
+    initial_budget = budget_manager.initial_budget
+    remaining = budget_manager.remaining_budget
+    won = []
+
+    for start in range(0, len(columns), BLOCK_SIZE):
+        prices = columns.market_price[start:start + BLOCK_SIZE].tolist()
+        block_values = values[start:start + BLOCK_SIZE].tolist()
+        exhausted = False
+
+        for offset, (market_price, value) in enumerate(zip(prices, block_values)):
+            roi_factor = value / (market_price + 1e-6)
+            bid = roi_factor * 1000 * (remaining / initial_budget)
+
+            if min_value is None or value > min_value:
+                bid = max(bid, market_price * floor_multiplier)
+            bid = min(bid, market_price * cap_multiplier)
+
+            if bid >= market_price and remaining >= market_price:
+                remaining -= market_price
+                total_spent += market_price
+                won.append(start + offset)
+
+            if remaining <= 0:
+                exhausted = True
+                break
+
+        if exhausted:
+            break
+
+    budget_manager.remaining_budget = remaining
+    return np.asarray(won, dtype=np.int64), total_spent
+
+
+# =========================================================
+# SHARED AUCTION
+# =========================================================
+
+class AuctionBidders:
+    """
+    Several campaigns' bidding parameters as per-campaign arrays, for
+    replaying them against each other in one shared auction. hour_labels
+    are the replayed columns' hour labels (ReplayColumns.hour_codes).
+    """
+
+    def __init__(self, configs, hour_labels):
+        self.optimized = np.array([c["strategy"] == "optimized" for c in configs], dtype=bool)
+        self.conversion_weight = np.array([c["conversion_weight"] for c in configs], dtype=np.float64)
+        self.base_bid = np.array([c["base_bid"] for c in configs], dtype=np.float64)
+        self.initial_budget = np.array([c["total_budget"] for c in configs], dtype=np.float64)
+        self.device_target = np.array(
+            [DEVICE_CODES[c.get("device_targeting", "all")] for c in configs], dtype=np.int64
+        )
+
+        # hour_allowed[c, code]: campaign c bids on rows of that hour slot
+        self.hour_allowed = np.ones((len(configs), len(hour_labels)), dtype=bool)
+        for c, config in enumerate(configs):
+            if config.get("active_hours"):
+                self.hour_allowed[c] = np.isin(hour_labels, config["active_hours"])
+
+    def __len__(self):
+        return len(self.initial_budget)
+
+
+def replay_shared_auction(
+    columns,
+    device_type,
+    ctr,
+    cvr,
+    bidders,
+    floor_multiplier=1.05,
+    cap_multiplier=1.5
+):
+    """
+    Replay every bidder against the others and the market in one pass
+    over the log (see kernels.shared_auction_kernel for the rules). Pure
+    fixed-bid campaigns may pass ctr / cvr as None.
+
+    Returns (summaries, remaining, spent, stats): one won-row summary per
+    bidder (see summarize_counters), the final remaining budgets and
+    spend arrays, and the counts of rows with bids, contested rows and
+    rows won by a bidder.
+    """
+
+    if ctr is None:
+        ctr = cvr = np.zeros(len(columns))
+
+    labels, codes = columns.hour_codes()
+    device_type = np.ascontiguousarray(device_type).astype(np.int64, copy=False)
+    remaining = bidders.initial_budget.copy()
+    spent = np.zeros(len(bidders))
+    stats = np.zeros(3, dtype=np.int64)
+
+    if kernels.HAS_NUMBA:
+        hour_counts = np.zeros((len(bidders), len(labels), 3), dtype=np.int64)
+        device_counts = np.zeros((len(bidders), 2, 3), dtype=np.int64)
+
+        kernels.shared_auction_kernel(
+            np.ascontiguousarray(ctr, dtype=np.float64),
+            np.ascontiguousarray(cvr, dtype=np.float64),
+            columns.market_price,
+            codes,
+            device_type,
+            columns.mobile,
+            columns.click,
+            columns.conversion,
+            bidders.optimized,
+            bidders.conversion_weight,
+            bidders.base_bid,
+            bidders.initial_budget,
+            remaining,
+            bidders.device_target,
+            bidders.hour_allowed,
+            float(floor_multiplier),
+            float(cap_multiplier),
+            spent,
+            hour_counts,
+            device_counts,
+            stats
+        )
+
+        summaries = [
+            summarize_counters(labels, hour_counts[c], device_counts[c])
+            for c in range(len(bidders))
+        ]
+    else:
+        won = _shared_auction_loop(
+            columns, codes, device_type, ctr, cvr, bidders,
+            floor_multiplier, cap_multiplier, remaining, spent, stats
+        )
+        summaries = [columns.summarize(rows) for rows in won]
+
+    return summaries, remaining, spent, {
+        "rows_with_bids": int(stats[kernels.BID_ROWS]),
+        "contested_rows": int(stats[kernels.CONTESTED_ROWS]),
+        "rows_won": int(stats[kernels.WON_ROWS])
+    }
+
+
+def _shared_auction_loop(
+    columns,
+    codes,
+    device_type,
+    ctr,
+    cvr,
+    bidders,
+    floor_multiplier,
+    cap_multiplier,
+    remaining_out,
+    spent_out,
+    stats
+):
+    # Same rules and floating point operations as shared_auction_kernel
+    n_campaigns = len(bidders)
+    optimized = bidders.optimized.tolist()
+    weights = bidders.conversion_weight.tolist()
+    base_bids = bidders.base_bid.tolist()
+    initial = bidders.initial_budget.tolist()
+    device_target = bidders.device_target.tolist()
+    hour_allowed = bidders.hour_allowed.tolist()
+
+    remaining = remaining_out.tolist()
+    spent = spent_out.tolist()
+    active = [True] * n_campaigns
+    n_active = n_campaigns
+    won = [[] for _ in range(n_campaigns)]
+    first_row = True
+
+    for start in range(0, len(columns), BLOCK_SIZE):
+        end = start + BLOCK_SIZE
+        rows = zip(
+            columns.market_price[start:end].tolist(),
+            codes[start:end].tolist(),
+            device_type[start:end].tolist(),
+            ctr[start:end].tolist(),
+            cvr[start:end].tolist()
+        )
+        exhausted = False
+
+        for offset, (price, code, device, row_ctr, row_cvr) in enumerate(rows):
+            winner = -1
+            best = 0.0
+            second = price
+            n_bids = 0
+
+            for c in range(n_campaigns):
+                if not active[c]:
+                    continue
+                if device_target[c] != 0 and device != device_target[c]:
+                    continue
+                if not hour_allowed[c][code]:
+                    continue
+
+                if optimized[c]:
+                    value = row_ctr + weights[c] * row_cvr
+                    roi_factor = value / (price + 1e-6)
+                    bid = roi_factor * 1000 * (remaining[c] / initial[c])
+
+                    bid = max(bid, price * floor_multiplier)
+                    bid = min(bid, price * cap_multiplier)
+                else:
+                    bid = base_bids[c]
+
+                if remaining[c] < bid:
+                    bid = remaining[c]
+                if not bid >= price:
+                    continue
+
+                n_bids += 1
+                if winner < 0 or bid > best:
+                    if winner >= 0 and best > second:
+                        second = best
+                    winner = c
+                    best = bid
+                elif bid > second:
+                    second = bid
+
+            if n_bids > 0:
+                stats[kernels.BID_ROWS] += 1
+                if n_bids > 1:
+                    stats[kernels.CONTESTED_ROWS] += 1
+
+            if winner >= 0:
+                stats[kernels.WON_ROWS] += 1
+                remaining[winner] -= second
+                spent[winner] += second
+                won[winner].append(start + offset)
+
+                if remaining[winner] <= 0:
+                    active[winner] = False
+                    n_active -= 1
+
+            if first_row:
+                first_row = False
+                for c in range(n_campaigns):
+                    if active[c] and remaining[c] <= 0:
+                        active[c] = False
+                        n_active -= 1
+
+            if n_active == 0:
+                exhausted = True
+                break
+
+        if exhausted:
+            break
+
+    remaining_out[:] = remaining
+    spent_out[:] = spent
+    return [np.asarray(rows, dtype=np.int64) for rows in won]
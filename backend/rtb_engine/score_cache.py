@@ -0,0 +1,142 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from rtb_engine import model_registry
+from rtb_engine.dataset_loader import dataset_fingerprint, dataset_source, iter_dataset_chunks
+
+
+# Predictions are persisted as one (2, rows) .npy of [ctr, cvr] per
+# dataset content and model version, so they survive restarts and are
+# shared by every worker process. They live in the user's cache directory
+# by default, outside the source tree.
+SCORE_CACHE_DIR = os.environ.get("BIDWISE_SCORE_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "bidwise", "scores"
+)
+
+# Score arrays kept open (memory-mapped) per process
+SCORE_CACHE_ENTRIES = int(os.environ.get("BIDWISE_SCORE_CACHE_ENTRIES", "16"))
+
+# Rows scored per predict_proba call when filling the cache
+SCORE_CHUNK_ROWS = 65536
+
+FEATURE_COLUMNS = [
+    "campaign_id",
+    "hour",
+    "device_type",
+    "floor_price",
+    "market_price"
+]
+
+# cache key -> (2, rows) array, least recently used first
+_scores = OrderedDict()
+_lock = threading.Lock()
+
+
+def predict_scores(df):
+    """(ctr, cvr) click and conversion probabilities for every row of df."""
+
+    if df.empty:
+        return np.empty(0), np.empty(0)
+
+    ctr_model, cvr_model = model_registry.get_models()
+    X = df[FEATURE_COLUMNS]
+
+    return ctr_model.predict_proba(X)[:, 1], cvr_model.predict_proba(X)[:, 1]
+
+
+def _cache_key(path):
+    return f"{dataset_fingerprint(path)[:32]}-{dataset_source(path)}-{model_registry.model_version()}"
+
+
+def get_scores(path="data/train.csv"):
+    """
+    (ctr, cvr) for every row of the dataset at path, in file order.
+
+    Scores are computed once per dataset content and model version and
+    stored under SCORE_CACHE_DIR; later calls (in any process) read them
+    back, so repeat simulations do no model inference. Callers select
+    rows with a boolean mask or slice instead of re-predicting subsets.
+    Scores are float64, exactly what predict_proba returns, so cached
+    and live runs make identical bidding decisions.
+    """
+
+    key = _cache_key(path)
+    scores = _lookup(key)
+
+    if scores is None:
+        scores = _compute_scores(path)
+
+        # Only persist if neither the data nor the models changed meanwhile
+        if _cache_key(path) == key:
+            _save_scores(os.path.join(SCORE_CACHE_DIR, f"{key}.npy"), scores)
+
+        _remember(key, scores)
+
+    return scores[0], scores[1]
+
+
+def cached_scores(path="data/train.csv"):
+    """
+    (ctr, cvr) for every row of the dataset at path if they are already
+    cached (in memory or under SCORE_CACHE_DIR), else None. Never runs
+    the models.
+    """
+
+    scores = _lookup(_cache_key(path))
+    return None if scores is None else (scores[0], scores[1])
+
+
+def _lookup(key):
+    with _lock:
+        scores = _scores.get(key)
+        if scores is not None:
+            _scores.move_to_end(key)
+            return scores
+
+    try:
+        scores = np.load(os.path.join(SCORE_CACHE_DIR, f"{key}.npy"), mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+
+    _remember(key, scores)
+    return scores
+
+
+def _remember(key, scores):
+    with _lock:
+        _scores[key] = scores
+        _scores.move_to_end(key)
+        while len(_scores) > SCORE_CACHE_ENTRIES:
+            _scores.popitem(last=False)
+
+
+def _compute_scores(path):
+    ctr_parts = []
+    cvr_parts = []
+
+    for chunk in iter_dataset_chunks(path, SCORE_CHUNK_ROWS):
+        ctr, cvr = predict_scores(chunk)
+        ctr_parts.append(ctr)
+        cvr_parts.append(cvr)
+
+    if not ctr_parts:
+        return np.empty((2, 0))
+
+    return np.vstack([np.concatenate(ctr_parts), np.concatenate(cvr_parts)])
+
+
+def _save_scores(file_path, scores):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    tmp_path = f"{file_path}.tmp-{os.getpid()}-{threading.get_ident()}.npy"
+    np.save(tmp_path, scores)
+    os.replace(tmp_path, file_path)
+
+
+def clear_score_cache():
+    """Forget in-memory score arrays (files on disk are kept)."""
+    with _lock:
+        _scores.clear()
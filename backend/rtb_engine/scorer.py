@@ -0,0 +1,143 @@
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+from rtb_engine import model_registry
+
+
+FEATURE_COLUMNS = [
+    "campaign_id",
+    "hour",
+    "device_type",
+    "floor_price",
+    "market_price"
+]
+
+# Largest allowed difference from predict_proba on the validation probe
+VALIDATION_TOLERANCE = 1e-9
+
+# model version -> LinearScorer, or None when the models are not linear
+_scorers = {}
+_lock = threading.Lock()
+
+
+def _sigmoid(z):
+    # Split on the sign so math.exp never overflows
+    if z >= 0:
+        return 1.0 / (1.0 + math.exp(-z))
+    e = math.exp(z)
+    return e / (1.0 + e)
+
+
+def _sigmoid_array(z):
+    # Same split as _sigmoid, elementwise: exp only sees -|z|
+    e = np.exp(-np.abs(z))
+    return np.where(z >= 0, 1.0 / (1.0 + e), e / (1.0 + e))
+
+
+class LinearScorer:
+    """
+    The CTR and CVR logistic regressions as plain arrays: both heads are
+    fused into one (features, 2) weight matrix, so scoring is a single
+    matmul plus a sigmoid with no DataFrame or sklearn validation.
+    """
+
+    def __init__(self, ctr_model, cvr_model):
+        self.weights = np.column_stack([
+            np.asarray(ctr_model.coef_, dtype=np.float64)[0],
+            np.asarray(cvr_model.coef_, dtype=np.float64)[0]
+        ])
+        self.bias = np.array([
+            float(ctr_model.intercept_[0]),
+            float(cvr_model.intercept_[0])
+        ])
+
+        # Python floats for the single-request path (no array overhead)
+        self._ctr_weights = tuple(self.weights[:, 0].tolist())
+        self._cvr_weights = tuple(self.weights[:, 1].tolist())
+        self._ctr_bias, self._cvr_bias = self.bias.tolist()
+
+    def score(self, features):
+        """(ctr, cvr) for one request; features in FEATURE_COLUMNS order."""
+
+        ctr = self._ctr_bias
+        cvr = self._cvr_bias
+        for x, w_ctr, w_cvr in zip(features, self._ctr_weights, self._cvr_weights):
+            ctr += w_ctr * x
+            cvr += w_cvr * x
+
+        return _sigmoid(ctr), _sigmoid(cvr)
+
+    def score_batch(self, X):
+        """(ctr, cvr) arrays for a (rows, features) array or feature frame."""
+
+        if isinstance(X, pd.DataFrame):
+            X = X[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+
+        probs = _sigmoid_array(np.asarray(X, dtype=np.float64) @ self.weights + self.bias)
+        return probs[:, 0], probs[:, 1]
+
+    def max_error(self, ctr_model, cvr_model, X):
+        """Largest absolute difference from predict_proba over frame X."""
+
+        ctr, cvr = self.score_batch(X)
+        rows = X.to_numpy(dtype=np.float64)
+        single = np.array([self.score(row) for row in rows.tolist()]).reshape(-1, 2)
+
+        return max(
+            np.abs(ctr - ctr_model.predict_proba(X)[:, 1]).max(),
+            np.abs(cvr - cvr_model.predict_proba(X)[:, 1]).max(),
+            np.abs(single[:, 0] - ctr).max(),
+            np.abs(single[:, 1] - cvr).max()
+        )
+
+
+def _validation_probe(rows=256):
+    # Fixed, broad sample of plausible feature values
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "campaign_id": rng.integers(0, 50, rows),
+        "hour": rng.integers(0, 24, rows),
+        "device_type": rng.integers(1, 3, rows),
+        "floor_price": rng.uniform(0, 50, rows),
+        "market_price": rng.uniform(0, 100, rows)
+    })[FEATURE_COLUMNS]
+
+
+def build_scorer(ctr_model, cvr_model):
+    """
+    LinearScorer for a pair of binary logistic regressions, or None if
+    the models are not of that form or do not match predict_proba within
+    VALIDATION_TOLERANCE (callers then keep using sklearn).
+    """
+
+    for model in (ctr_model, cvr_model):
+        coef = getattr(model, "coef_", None)
+        if coef is None or np.shape(coef) != (1, len(FEATURE_COLUMNS)):
+            return None
+        if not hasattr(model, "intercept_") or len(getattr(model, "classes_", ())) != 2:
+            return None
+
+    scorer = LinearScorer(ctr_model, cvr_model)
+
+    error = scorer.max_error(ctr_model, cvr_model, _validation_probe())
+    if not error <= VALIDATION_TOLERANCE:
+        print(f"[scorer] Native scorer differs from predict_proba by {error}, using sklearn")
+        return None
+
+    return scorer
+
+
+def get_scorer():
+    """Validated LinearScorer for the current models (None if not linear)."""
+
+    version = model_registry.model_version()
+
+    if version not in _scorers:
+        with _lock:
+            if version not in _scorers:
+                _scorers[version] = build_scorer(*model_registry.get_models())
+
+    return _scorers[version]
@@ -1,73 +1,38 @@
 import pandas as pd
-from rtb_engine.predicator import Predictor
 from rtb_engine.budget_manager import BudgetManager
 from rtb_engine.strategy import BiddingStrategy
 from rtb_engine.dataset_loader import load_dataset
+from rtb_engine.replay import ReplayColumns, replay_fixed_bid, replay_roi_pacing
+from rtb_engine.score_cache import get_scores
 
 def run_simulation(initial_budget=10000):
     df = load_dataset("data/train.csv")
 
-    predictor = Predictor()
     budget_manager = BudgetManager(initial_budget)
 
-    # Prepare features once
-    feature_columns = [
-        "campaign_id",
-        "hour",
-        "device_type",
-        "floor_price",
-        "market_price"
-    ]
+    # Predictions are computed once per dataset and model version
+    ctr_probs, cvr_probs = get_scores("data/train.csv")
 
-    X = df[feature_columns]
-
-    # Vectorized prediction (FAST)
-    ctr_probs = predictor.ctr_model.predict_proba(X)[:, 1]
-    cvr_probs = predictor.cvr_model.predict_proba(X)[:, 1]
-
-    total_clicks = 0
-    total_conversions = 0
     conversion_weight = 5
     base_bid = 10
 
-    for i in range(len(df)):
-
-        ctr = ctr_probs[i]
-        cvr = cvr_probs[i]
-
-        # Value of impression
-        value = ctr_probs[i] + conversion_weight * cvr_probs[i]
-
-        # Make bid proportional to expected ROI vs market
-        market_price = df.iloc[i]["market_price"]
-
-        roi_factor = value / (market_price + 1e-6)
-
-        scaled_value = roi_factor * 1000
-
-        budget_factor = budget_manager.get_budget_factor()
-        bid = scaled_value * budget_factor
-
-
-        # If strong predicted value → stay competitive
-        if value > 0.02:
-            bid = max(bid, market_price * 0.8)
-
-        # Avoid extreme overbidding
-        bid = min(bid, market_price * 1.5)
-
-        # Win auction
-        if bid >= market_price and budget_manager.can_bid(market_price):
-            budget_manager.deduct(market_price)
-
-            if df.iloc[i]["click"] == 1:
-                total_clicks += 1
-
-            if df.iloc[i]["conversion"] == 1:
-                total_conversions += 1
-
-        if budget_manager.remaining_budget <= 0:
-            break
+    # Bid proportional to expected ROI (ctr + N * cvr) vs market; strong
+    # predicted value (> 0.02) stays competitive at 0.8x market, never
+    # above 1.5x
+    columns = ReplayColumns.from_frame(df)
+    summary, _ = replay_roi_pacing(
+        columns,
+        ctr_probs,
+        cvr_probs,
+        conversion_weight,
+        budget_manager,
+        floor_multiplier=0.8,
+        cap_multiplier=1.5,
+        min_value=0.02
+    )
+
+    total_clicks = summary["clicks"]
+    total_conversions = summary["conversions"]
 
     final_score = total_clicks + conversion_weight * total_conversions
 
@@ -84,25 +49,13 @@ def run_baseline(initial_budget=10000, fixed_bid=5):
 
     budget_manager = BudgetManager(initial_budget)
 
-    total_clicks = 0
-    total_conversions = 0
     conversion_weight = 5
 
-    for i in range(len(df)):
-
-        market_price = df.iloc[i]["market_price"]
-
-        if fixed_bid >= market_price and budget_manager.can_bid(market_price):
-            budget_manager.deduct(market_price)
-
-            if df.iloc[i]["click"] == 1:
-                total_clicks += 1
-
-            if df.iloc[i]["conversion"] == 1:
-                total_conversions += 1
+    columns = ReplayColumns.from_frame(df)
+    summary, _ = replay_fixed_bid(columns, budget_manager, fixed_bid)
 
-        if budget_manager.remaining_budget <= 0:
-            break
+    total_clicks = summary["clicks"]
+    total_conversions = summary["conversions"]
 
     final_score = total_clicks + conversion_weight * total_conversions
 
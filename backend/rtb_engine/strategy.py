@@ -6,8 +6,11 @@ class BiddingStrategy:
         self.base_bid = base_bid
 
     def generate_bid(self, features):
-        ctr = self.predictor.predict_ctr(features)
-        cvr = self.predictor.predict_cvr(features)
+        ctr, cvr = self.predictor.predict(features)
+        return self.bid_for_scores(ctr, cvr)
+
+    def bid_for_scores(self, ctr, cvr):
+        """Bid for a request whose ctr / cvr were already predicted."""
 
         expected_value = ctr + self.N * cvr
 
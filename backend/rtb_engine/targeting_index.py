@@ -0,0 +1,165 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from rtb_engine.column_store import META_FILE, STORE_SUFFIX, is_store_fresh, read_columns, store_path_for
+from rtb_engine.dataset_loader import load_dataset
+
+
+# device_targeting value -> device_type code in the logs ("all" is 0,
+# which no row has: it stands for no device filter)
+DEVICE_CODES = {"all": 0, "mobile": 1, "desktop": 2}
+
+# Indexes kept in memory per process (least recently used are evicted)
+TARGETING_INDEX_ENTRIES = int(os.environ.get("BIDWISE_TARGETING_INDEX_ENTRIES", "16"))
+
+# abs path -> (mtime_ns, size, TargetingIndex), least recently used first
+_indexes = OrderedDict()
+_lock = threading.Lock()
+
+
+class TargetingIndex:
+    """
+    Inverted index from (device_type, hour) buckets to the ids of the rows
+    in each bucket, in ascending order.
+
+    All row ids live in one array grouped by bucket (a stable argsort of
+    the bucket keys), with offsets marking where each bucket starts, so a
+    bucket is a slice of that array and resolving a campaign's targeting
+    never scans the log.
+    """
+
+    def __init__(self, device_type, hour):
+        device_type = np.asarray(device_type)
+        hour = np.asarray(hour)
+
+        self.rows = len(hour)
+        self.devices, device_codes = np.unique(device_type, return_inverse=True)
+        self.hours, hour_codes = np.unique(hour, return_inverse=True)
+
+        n_buckets = len(self.devices) * len(self.hours)
+        keys = device_codes.reshape(-1) * len(self.hours) + hour_codes.reshape(-1)
+
+        # Small keys sort with a linear-time radix sort
+        if n_buckets <= np.iinfo(np.uint16).max:
+            keys = keys.astype(np.uint16)
+
+        row_dtype = np.int32 if self.rows < np.iinfo(np.int32).max else np.int64
+        self.row_ids = np.argsort(keys, kind="stable").astype(row_dtype)
+
+        self.offsets = np.zeros(n_buckets + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=n_buckets), out=self.offsets[1:])
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df["device_type"].to_numpy(), df["hour"].to_numpy())
+
+    @property
+    def nbytes(self):
+        return self.row_ids.nbytes + self.offsets.nbytes
+
+    def select(self, device_targeting="all", active_hours=None):
+        """
+        Ascending ids of the rows matching the targeting (same rows and
+        order as scanning the log with targeted_rows), or None when the
+        targeting does not filter anything.
+        """
+
+        if device_targeting == "all" and not active_hours:
+            return None
+
+        devices = np.arange(len(self.devices))
+        if device_targeting != "all":
+            devices = np.flatnonzero(self.devices == DEVICE_CODES[device_targeting])
+
+        hours = np.arange(len(self.hours))
+        if active_hours:
+            hours = np.flatnonzero(np.isin(self.hours, active_hours))
+
+        buckets = (devices[:, None] * len(self.hours) + hours[None, :]).reshape(-1)
+        parts = [
+            self.row_ids[self.offsets[b]:self.offsets[b + 1]]
+            for b in buckets
+            if self.offsets[b + 1] > self.offsets[b]
+        ]
+
+        if not parts:
+            return np.empty(0, dtype=self.row_ids.dtype)
+        if len(parts) == 1:
+            return parts[0]
+
+        # Each part is already sorted: a stable (merge) sort of sorted runs
+        # costs about rows * log(runs)
+        return np.sort(np.concatenate(parts), kind="stable")
+
+
+def get_targeting_index(path="data/train.csv"):
+    """
+    TargetingIndex of the dataset at path, built on first use and kept
+    until the file changes. It is built from the memory-mapped column
+    store when one is up to date, otherwise from the (cached) dataset.
+    """
+
+    key = os.path.abspath(path)
+    is_store = path.endswith(STORE_SUFFIX)
+    stat = os.stat(os.path.join(path, META_FILE) if is_store else path)
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _lock:
+        entry = _indexes.get(key)
+        if entry is not None and entry[:2] == version:
+            _indexes.move_to_end(key)
+            return entry[2]
+
+    store_dir = path if is_store else store_path_for(path)
+    if is_store or is_store_fresh(store_dir, path):
+        columns = read_columns(store_dir, names=["device_type", "hour"])
+        index = TargetingIndex(columns["device_type"], columns["hour"])
+    else:
+        index = TargetingIndex.from_frame(load_dataset(path))
+
+    with _lock:
+        _indexes[key] = (*version, index)
+        _indexes.move_to_end(key)
+        while len(_indexes) > TARGETING_INDEX_ENTRIES:
+            _indexes.popitem(last=False)
+
+    return index
+
+
+def select_rows(path, device_targeting="all", active_hours=None):
+    """
+    Ascending ids of the rows of the dataset at path matching the
+    targeting, or None when it does not filter anything (no index is
+    built for that).
+    """
+
+    if device_targeting == "all" and not active_hours:
+        return None
+    return get_targeting_index(path).select(device_targeting, active_hours)
+
+
+def targeted_rows(device_type, hour, device_targeting="all", active_hours=None):
+    """
+    Ids of the rows matching the targeting found by scanning the given
+    columns, or None when it does not filter anything. For streamed
+    chunks, which are not worth indexing.
+    """
+
+    mask = None
+
+    if device_targeting != "all":
+        mask = np.asarray(device_type) == DEVICE_CODES[device_targeting]
+
+    if active_hours:
+        hours = np.isin(hour, active_hours)
+        mask = hours if mask is None else mask & hours
+
+    return None if mask is None else np.flatnonzero(mask)
+
+
+def clear_targeting_indexes():
+    with _lock:
+        _indexes.clear()
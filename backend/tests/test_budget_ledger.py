@@ -0,0 +1,165 @@
+"""
+Budget ledger checks: reserve / commit / release accounting, bid expiry
+through CampaignBidder, and a reduced run of benchmarks/ledger_stress.py
+(no overspend, no reservations left, no lost updates).
+"""
+
+import argparse
+from types import SimpleNamespace
+
+import pytest
+
+from app import bidding
+from benchmarks import ledger_stress
+from rtb_engine.budget_ledger import BudgetLedger, SharedBudgetLedger
+
+
+@pytest.fixture(params=["memory", "shared"])
+def ledger(request, tmp_path):
+    if request.param == "memory":
+        yield BudgetLedger()
+        return
+
+    shared = SharedBudgetLedger(str(tmp_path / "budget.ledger"), slots=64)
+    yield shared
+    shared.close_file()
+
+
+# ===== RESERVE / COMMIT / RELEASE =====
+
+def test_reserve_commit_release(ledger):
+    ledger.open("c1", 10)
+
+    assert ledger.reserve("c1", 6)
+    assert not ledger.reserve("c1", 5)
+    assert ledger.balance("c1")["available"] == 4
+
+    assert ledger.commit("c1", 6, 2.5) == 7.5
+    assert ledger.reserve("c1", 5)
+    ledger.release("c1", 5)
+
+    assert ledger.balance("c1") == {
+        "total": 10, "spent": 2.5, "reserved": 0, "remaining": 7.5, "available": 7.5
+    }
+
+
+def test_commit_cannot_exceed_reservation(ledger):
+    ledger.open("c1", 10)
+    assert ledger.reserve("c1", 2)
+
+    with pytest.raises(ValueError):
+        ledger.commit("c1", 2, 3)
+    with pytest.raises(ValueError):
+        ledger.commit("c1", 4, 1)
+
+
+def test_reopen_keeps_spending(ledger):
+    ledger.open("c1", 10)
+    ledger.reserve("c1", 4)
+    ledger.commit("c1", 4, 4)
+
+    account = ledger.open("c1", 10)
+    assert account.remaining_budget == 6
+
+
+def test_shared_ledger_is_seen_by_every_instance(tmp_path):
+    path = str(tmp_path / "budget.ledger")
+    first = SharedBudgetLedger(path, slots=64)
+    second = SharedBudgetLedger(path, slots=64)
+
+    first.open("c1", 10)
+    assert second.reserve("c1", 7)
+    assert not first.reserve("c1", 4)
+
+    second.commit("c1", 7, 3)
+    assert first.balance("c1")["spent"] == 3
+
+    first.close_file()
+    second.close_file()
+
+
+def test_shared_ledger_reuses_closed_slots(tmp_path):
+    ledger = SharedBudgetLedger(str(tmp_path / "budget.ledger"), slots=4)
+
+    # Many more campaigns over time than the table has slots
+    for i in range(50):
+        ledger.open(f"c{i}", 10)
+        assert ledger.reserve(f"c{i}", 3)
+        ledger.close(f"c{i}")
+
+    for i in range(4):
+        ledger.open(f"open-{i}", 10)
+    with pytest.raises(RuntimeError):
+        ledger.open("one-too-many", 10)
+
+    ledger.close_file()
+
+
+def test_shared_ledger_ignores_reused_slots_of_closed_accounts(tmp_path):
+    path = str(tmp_path / "budget.ledger")
+    first = SharedBudgetLedger(path, slots=1)
+    second = SharedBudgetLedger(path, slots=1)
+
+    first.open("old", 10)
+    assert second.reserve("old", 2)
+
+    # second still remembers the slot that "new" takes over
+    first.close("old")
+    first.open("new", 20)
+
+    with pytest.raises(KeyError):
+        second.reserve("old", 1)
+    second.close("old")
+    assert first.balance("new") == {
+        "total": 20, "spent": 0, "reserved": 0, "remaining": 20, "available": 20
+    }
+
+    first.close_file()
+    second.close_file()
+
+
+# ===== BID EXPIRY =====
+
+def test_expired_bids_release_their_reservation(ledger, monkeypatch):
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(bidding, "time", SimpleNamespace(monotonic=lambda: clock.now))
+    monkeypatch.setattr(bidding, "_ledger", ledger)
+    monkeypatch.setattr(bidding, "get_predictor", lambda: None)
+
+    campaign = SimpleNamespace(
+        id="c1", total_budget=10, base_bid=1, conversion_weight=1,
+        device_targeting="all", active_hours=[]
+    )
+    bidder = bidding.CampaignBidder(campaign)
+
+    stale_id, stale_price = bidder.place_bid(1, 1, 0)
+    assert ledger.balance("c1")["reserved"] == stale_price
+
+    clock.now += bidding.BID_WIN_TIMEOUT_SECONDS + 1
+    bid_id, price = bidder.place_bid(1, 1, 0)
+
+    assert bidder.expired == 1
+    assert ledger.balance("c1")["reserved"] == price
+    with pytest.raises(KeyError):
+        bidder.win(stale_id, stale_price)
+
+    assert bidder.win(bid_id, price / 2) == 10 - price / 2
+    assert ledger.balance("c1")["reserved"] == 0
+
+
+# ===== STRESS =====
+
+@pytest.mark.parametrize("mode, shared", [("threads", False), ("threads", True), ("processes", False)])
+def test_ledger_stress(mode, shared):
+    args = argparse.Namespace(
+        mode=mode, shared=shared, workers=4, ops=2000, campaigns=2,
+        budget=200, max_bid=5, win_rate=0.5
+    )
+    _, checks = ledger_stress.run_ledger(args)
+
+    for check in checks.values():
+        assert check["no_overspend"]
+        assert check["no_reservations_left"]
+        assert check["no_lost_updates"]
+        # The load is sized to run every campaign out of budget
+        assert check["budget_used"] > 0.9
@@ -1,5 +1,5 @@
 import pandas as pd
-import joblib
+from rtb_engine.model_registry import save_model
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import roc_auc_score
@@ -46,8 +46,8 @@ cvr_pred = cvr_model.predict_proba(X_val)[:, 1]
 print("CTR ROC-AUC:", roc_auc_score(y_click_val, ctr_pred))
 print("CVR ROC-AUC:", roc_auc_score(y_conv_val, cvr_pred))
 
-# Save models
-joblib.dump(ctr_model, "models/ctr_model.pkl")
-joblib.dump(cvr_model, "models/cvr_model.pkl")
+# Save models (atomically, so running API workers hot-reload them safely)
+save_model(ctr_model, "models/ctr_model.pkl")
+save_model(cvr_model, "models/cvr_model.pkl")
 
 print("Models saved successfully.")